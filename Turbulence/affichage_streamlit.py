@@ -6,80 +6,216 @@ Interface graphique du projet MGA802 (ÉTS Montréal).
 
 Fonctionnalité
 --------------
-1. **Instancie** une seule fois le collecteur temps réel
-   :class:`main.Main` (thread *daemon*) et le stocke dans
-   :pydata:`st.session_state`.
+1. **Instancie** une seule fois *par processus* le collecteur temps réel
+   :class:`main.Main` (thread *daemon*) via :func:`st.cache_resource` :
+   tous les onglets et utilisateurs partagent le même collecteur, donc les
+   mêmes requêtes OpenSky / Open-Meteo. Seules les options d’affichage
+   relèvent de :pydata:`st.session_state`.
+
+   Si la variable d’environnement ``TURBULENCE_MEMOIRE_PARTAGEE`` est
+   définie, aucun collecteur n’est lancé : la page lit sans copie le segment
+   publié par un collecteur *headless* (``python main.py
+   --memoire-partagee NOM``), qui tourne sur son propre cœur. Le collecteur
+   peut être redémarré indépendamment : la page se rattache au nouveau
+   segment et signale une publication périmée.
+
+   Si ``TURBULENCE_PORT_HTTP`` est définie, le collecteur partagé est
+   aussi diffusé par :class:`serveur_http.ServeurCellules` sur ce port.
 2. **Récupère** à chaque rafraîchissement la copie thread-safe
-   ``app.to_display`` (NumPy *(N, 4)* : lon, lat, alt, diam).
+   ``app.to_display`` (NumPy *(N, 5)* : lat, lon, alt, diam, confiance) et
+   sa génération.
 3. **Affiche** la carte des turbulences via
-   :class:`affiche_carte.Data` + :class:`affiche_carte.Carte`.
+   :class:`affiche_carte.Data` + :class:`affiche_carte.Carte` ; la carte
+   n’est reconstruite que lorsque la génération publiée ou le zoom change.
+   Le zoom, choisi dans la barre latérale (option propre à la session),
+   détermine le niveau de détail : agrégats de grille aux zooms faibles,
+   zones individuelles au-delà.
+   En mode collecteur intégré, un curseur temporel permet de rejouer l’un
+   des instantanés conservés dans ``app.historique``, sans recalcul, et une
+   couche facultative affiche la climatologie des turbulences
+   (:class:`climatologie.RasterDensite`, sauvegardée dans
+   ``climatologie.npz``) sur l’horizon choisi.
+   Un sélecteur de niveau n’affiche que la bande d’altitude choisie
+   (:mod:`bandes`), tranche contiguë du tableau publié.
 4. **Montre** une légende (couleur, taille, opacité) et un exemple de
-   cisaillement sous forme de bulles bleues.
+   cisaillement sous forme de bulles bleues, dessinée une seule fois.
 5. **Auto-rafraîchit** la page toutes les 3 s grâce à
    :func:`streamlit_autorefresh.st_autorefresh`.
 
 """
 
 
+import atexit
+import io
+import os
+import time
+
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 import matplotlib.pyplot as plt
 
 from main            import Main           # ta classe avec le thread
 from affiche_carte   import Data, Carte    # tes classes d’affichage
+from memoire_partagee import TamponPartage
+from serveur_http    import ServeurCellules
+from climatologie    import RasterDensite
+from bandes          import NB_BANDES, debuts_bandes, libelle, tranche
 
 st.set_page_config(layout="wide")
 
 # ────────────────────────────────────────────────
-# 1. Instance unique du collecteur
+# 1. Instance unique du collecteur (partagée par toutes les sessions)
 # ────────────────────────────────────────────────
-if "app" not in st.session_state:
-    st.session_state.app = Main()          # lance le thread daemon
-
-app = st.session_state.app                 # raccourci
+@st.cache_resource
+def collecteur():
+    """Crée et démarre le collecteur commun à toutes les sessions."""
+    climatologie = RasterDensite(fichier="climatologie.npz")
+    app = Main(climatologie=climatologie).start()  # lance le thread daemon
+    atexit.register(app.stop, timeout=5)   # arrêt propre du serveur
+    atexit.register(climatologie.sauvegarder)
+    port = os.environ.get("TURBULENCE_PORT_HTTP")
+    if port:
+        atexit.register(ServeurCellules(app, port=int(port)).start().stop)
+    return app
+
+@st.cache_resource
+def tampon_partage(nom):
+    """Se rattache au segment publié par un collecteur hors processus."""
+    return TamponPartage(nom)
+
+@st.cache_resource(max_entries=8)
+def deck_turbulences(lancement, generation, zoom, horizon, bande, _points):
+    """
+    Carte PyDeck d’une génération et d’une bande ; reconstruite seulement si elles changent.
+
+    ``lancement`` distingue les exécutions successives du collecteur hors
+    processus, dont les générations repartent de 1 (``0`` sinon).
+    """
+    chaleur = None if horizon is None else collecteur().climatologie.points_chaleur(horizon)
+    return Carte(Data(_points), zoom=zoom, chaleur=chaleur).construire_deck()
+
+def points_bande(points, bande):
+    """Tranche contiguë d’une bande dans un tableau trié par bande (tout si ``None``)."""
+    return points if bande is None else points[tranche(debuts_bandes(points), bande)]
+
+@st.cache_resource
+def legende_png():
+    """Image statique de la légende d’opacité, rendue une seule fois."""
+    fig, ax = plt.subplots(figsize=(7, 1.5))
+    ax.set_xlim(0, 8)
+    ax.set_ylim(0, 1)
+    ax.axis("off")
+
+    niveaux = [0 ,10, 30, 50, 70, 90, 100]
+    couleurs = [[1, 0, 0, 160 / 255] if conf >= Carte.SEUIL_PROBABLE else [0, 0, 1, conf / 100]
+                for conf in niveaux]
+    tailles = [300 + conf * 2 for conf in niveaux]
+
+    for i, (taille, color, conf) in enumerate(zip(tailles, couleurs, niveaux)):
+        ax.scatter(i + 1, 0.5, s=taille, color=color)
+        ax.text(i + 1, 0.1, f"{conf}%", ha='center', fontsize=8)
+
+    image = io.BytesIO()
+    fig.savefig(image, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return image.getvalue()
+
+NOM_SEGMENT = os.environ.get("TURBULENCE_MEMOIRE_PARTAGEE")
 
 # ────────────────────────────────────────────────
 # 2. Récupère les points à afficher
 # ────────────────────────────────────────────────
-with app.lock:
-    points = app.to_display.copy()                    # ndarray (N,4) lon, lat, alt, diam
+lancement, sequence = 0, None
+if NOM_SEGMENT:
+    try:
+        tampon = tampon_partage(NOM_SEGMENT)
+        if tampon.est_remplace():
+            # Collecteur redémarré : l'ancien segment est abandonné, et avec
+            # lui les cartes de ses générations
+            tampon.fermer()
+            tampon_partage.clear()
+            deck_turbulences.clear()
+            tampon = tampon_partage(NOM_SEGMENT)
+    except FileNotFoundError:
+        st.warning(f"Segment « {NOM_SEGMENT} » introuvable : lancez "
+                   f"`python main.py --memoire-partagee {NOM_SEGMENT}`.")
+        st_autorefresh(interval=3000, key="refresh")
+        st.stop()
+    points, generation, sequence = tampon.lire()     # vue float32 sans copie
+    lancement = tampon.lancement
+    if tampon.perime:
+        st.warning("Le collecteur ne publie plus : affichage de la dernière "
+                   "publication complète.")
+else:
+    app = collecteur()                                # même objet pour chaque onglet
+    if not app.en_cours:
+        app.start()                                   # thread arrêté : relance
+    with app.lock:
+        points = app.to_display.copy()                # ndarray (N,5) lat, lon, alt, diam, conf
+        generation = app.generation
 
 st.header("🌪️  Carte des turbulences (auto-refresh 3 s)")
 
+# Options d'affichage propres à la session
+zoom = st.sidebar.slider("Zoom", min_value=1, max_value=10, value=3, key="zoom")
+
+HORIZONS = {"Aucune": None, "1 h": 0, "24 h": 1, "7 j": 2}
+horizon = None
+if not NOM_SEGMENT:
+    horizon = HORIZONS[st.sidebar.selectbox("Climatologie", list(HORIZONS), key="horizon")]
+
+if not NOM_SEGMENT and not st.sidebar.checkbox("Direct", value=True, key="direct"):
+    instants = dict(app.historique.index())           # génération -> horodatage
+    if instants:
+        if st.session_state.get("instant") not in instants:
+            st.session_state["instant"] = max(instants)
+        choix = st.sidebar.select_slider(
+            "Instantané", options=list(instants), key="instant",
+            format_func=lambda gen: time.strftime("%H:%M:%S", time.localtime(instants[gen])))
+        archive = app.historique.instantane(choix)
+        if archive is not None:
+            generation, points = choix, archive[1]
+            st.caption(f"Relecture de l’état publié à "
+                       f"{time.strftime('%H:%M:%S', time.localtime(archive[0]))}")
+
+# Bande d'altitude : les cellules publiées sont triées par bande, on ne garde
+# que la tranche contiguë choisie
+bande = st.sidebar.selectbox(
+    "Niveau", [None, *range(NB_BANDES)], key="bande",
+    format_func=lambda b: "Tous" if b is None else libelle(b))
+points = points_bande(points, bande)
+
 if points.size:
     # points est déjà au bon format pour Data :
-    # colonne 0 : lon | colonne 1 : lat | 2 : alt | 3 : diam
-    Carte(Data(points)).affichage()
+    # colonne 0 : lat | colonne 1 : lon | 2 : alt | 3 : diam | 4 : confiance
+    deck = deck_turbulences(lancement, generation, zoom, horizon, bande, points)
+    if sequence is not None and not tampon.est_valide(sequence):
+        # Emplacement réécrit pendant la construction : carte refaite sur une copie validée
+        deck_turbulences.clear()
+        copie, generation = tampon.copier()
+        deck = deck_turbulences(lancement, generation, zoom, horizon, bande,
+                                points_bande(copie, bande))
+    st.pydeck_chart(deck)
 
     st.markdown("### 🧭 Légende de la carte")
     col1, col2 = st.columns([1, 3])
 
     with col1:
         st.markdown("**Couleurs**")
-        st.markdown("- 🟥 **Rouge** : turbulence originale (confiance 100%)")
-        st.markdown("- 🟦 **Bleu** : turbulence prédite (confiance < 100%)")
+        st.markdown(f"- 🟥 **Rouge** : turbulence probable (confiance ≥ {Carte.SEUIL_PROBABLE}%), "
+                    "détection récente ou signalée par plusieurs avions")
+        st.markdown(f"- 🟦 **Bleu** : turbulence prédite ou peu sûre (confiance < {Carte.SEUIL_PROBABLE}%)")
 
         st.markdown("**Taille**")
         st.markdown("- Proportionnelle au **diamètre estimé** de la turbulence")
+        st.markdown("- Aux zooms faibles : une case par zone de grille "
+                    "(nombre, confiance et FL maximaux au survol)")
 
         st.markdown("**Opacité**")
-        st.markdown("- Dépend du **niveau de confiance** (de 0% à 100%)")
+        st.markdown("- Dépend du **niveau de confiance** pour les zones bleues (de 0% à 100%)")
 
     with col2:
-        fig, ax = plt.subplots(figsize=(7, 1.5))
-        ax.set_xlim(0, 8)
-        ax.set_ylim(0, 1)
-        ax.axis("off")
-
-        niveaux = [0 ,10, 30, 50, 70, 90, 100]
-        couleurs = [[0, 0, 1, conf / 100] for conf in niveaux]
-        tailles = [300 + conf * 2 for conf in niveaux]
-
-        for i, (taille, color, conf) in enumerate(zip(tailles, couleurs, niveaux)):
-            ax.scatter(i + 1, 0.5, s=taille, color=color)
-            ax.text(i + 1, 0.1, f"{conf}%", ha='center', fontsize=8)
-
-        st.pyplot(fig)
+        st.image(legende_png())
 
 else:
     st.info("Aucune turbulence pour l’instant.")
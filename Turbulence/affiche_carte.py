@@ -4,20 +4,31 @@ affiche_carte.py ― Visualisation Streamlit/PyDeck
 
 Module d’affichage du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
 
-Il expose deux classes :
+Il expose deux classes et une fonction :
 
 * **Data**  – Convertit un tableau NumPy/Python en :class:`pandas.DataFrame`
   enrichi (colonnes géographiques + métadonnées).
 * **Carte** – Affiche toutes les zones de turbulence dans une unique
   :class:`pydeck.Layer` *Scatterplot*, avec couleur/diamètre/opacité
   paramétrés par la confiance et le diamètre estimé.
+* **agreger_grille** – Agrège les zones sur une grille (niveau de détail
+  adapté aux zooms faibles).
+
+Couleurs et rayons sont calculés par masques NumPy et seules les colonnes
+utiles au rendu sont transmises au navigateur. Streamlit sérialisant la
+carte en JSON (le transport binaire de PyDeck n’y est pas disponible), la
+charge utile est réduite au strict nécessaire : colonnes courtes, valeurs
+arrondies, aucune étiquette texte par point.
 """
 
 
+import numpy as np
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
 
+from geodesie import KM_PAR_DEGRE, metres_vers_niveau_de_vol
+
 
 class Data:
     """
@@ -41,6 +52,14 @@ class Data:
         self.turbulences = tableau_turbulences
         self.label = label
 
+    def tableau(self):
+        """
+                Renvoie les données sous forme de tableau ``float32`` *(N, 5)*.
+
+                :rtype: numpy.ndarray
+        """
+        return np.asarray(self.turbulences, dtype=np.float32).reshape(-1, 5)
+
     def generer_dataframe(self):
         """
                 Génère un DataFrame pandas enrichi à partir des données.
@@ -48,72 +67,256 @@ class Data:
                 :return: Un DataFrame avec colonnes géographiques, attributs et métadonnées.
                 :rtype: pandas.DataFrame
         """
-        df = pd.DataFrame(self.turbulences, columns=['latitude', 'longitude', 'altitude', 'diametre', 'confiance'])
-        df['Turbulences'] = [f'Zone {i + 1} ({self.label})' for i in range(len(df))]
+        df = pd.DataFrame(self.tableau(), columns=['latitude', 'longitude', 'altitude', 'diametre', 'confiance'])
+        numeros = pd.Series(np.arange(1, len(df) + 1), index=df.index).astype(str)
+        df['Turbulences'] = 'Zone ' + numeros + f' ({self.label})'
         df['source'] = self.label
         return df
 
+def agreger_grille(points, pas_deg):
+    """
+    Agrège les zones de turbulence sur une grille régulière en degrés.
+
+    Le regroupement est entièrement vectorisé : chaque zone reçoit la clé
+    de sa case, les clés sont triées puis réduites par segment
+    (:func:`numpy.maximum.reduceat`).
+
+    :param points: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+    :type points: numpy.ndarray
+    :param pas_deg: Côté d’une case de la grille, en degrés.
+    :type pas_deg: float
+    :return: Tableau *(M, 5)* ``[lat, lon, nombre, confiance_max, alt_max]``,
+        une ligne par case occupée (centre de la case).
+    :rtype: numpy.ndarray
+    """
+    n_lon = int(np.ceil(360 / pas_deg))
+    i_lat = np.floor((points[:, 0] + 90) / pas_deg).astype(np.int64)
+    i_lon = np.floor((points[:, 1] + 180) / pas_deg).astype(np.int64) % n_lon
+    cles = i_lat * n_lon + i_lon
+
+    ordre = np.argsort(cles, kind="stable")
+    cles_triees = cles[ordre]
+    debuts = np.flatnonzero(np.r_[True, cles_triees[1:] != cles_triees[:-1]])
+    cases = cles_triees[debuts]
+
+    agregats = np.empty((len(cases), 5), dtype=np.float32)
+    agregats[:, 0] = (cases // n_lon + 0.5) * pas_deg - 90
+    agregats[:, 1] = (cases % n_lon + 0.5) * pas_deg - 180
+    agregats[:, 2] = np.diff(np.r_[debuts, len(cles)])
+    agregats[:, 3] = np.maximum.reduceat(points[ordre, 4], debuts)
+    agregats[:, 4] = np.maximum.reduceat(points[ordre, 2], debuts)
+    return agregats
+
+
 class Carte:
     """
     Carte interactive PyDeck des turbulences en cours.
 
+    Au-delà de ``seuil_points`` zones et en deçà du niveau de zoom
+    ``zoom_detail``, les zones sont agrégées côté serveur sur une grille
+    dont le pas dépend du zoom (:func:`agreger_grille`) : la taille de la
+    charge utile suit alors la surface affichée et non le nombre de zones.
+
     Parameters
     ----------
     *data_objects : Data
         Un ou plusieurs objets :class:`Data` fournissant chacun un
         DataFrame à afficher.
+    zoom : float, default ``3``
+        Niveau de zoom initial de la carte.
+    zoom_detail : float, default ``7``
+        Zoom à partir duquel les zones sont toujours affichées une à une.
+    seuil_points : int, default ``5000``
+        Nombre de zones au-dessous duquel aucune agrégation n’est faite.
+    chaleur : numpy.ndarray | None, optional
+        Tableau *(M, 3)* ``[lat, lon, poids]`` affiché sous forme de carte
+        de chaleur (climatologie, cf. :class:`climatologie.RasterDensite`).
     """
 
-    def __init__(self, *data_objects):
+    # Côté d'une case d'agrégation, en pixels d'écran (tuiles de 256 px)
+    PIXELS_PAR_CASE = 32
+
+    # Confiance (%) à partir de laquelle une zone est dessinée en rouge :
+    # un saut de vertical_rate de 7 m/s ou plusieurs signalements plus faibles
+    SEUIL_PROBABLE = 50
+
+    def __init__(self, *data_objects, zoom=3, zoom_detail=7, seuil_points=5000,
+                 chaleur=None):
         self.data_objects = data_objects
+        self.chaleur = chaleur
+        self.zoom = zoom
+        self.zoom_detail = zoom_detail
+        self.seuil_points = seuil_points
 
-    def affichage(self):
+    @staticmethod
+    def couleurs_confiance(confiance):
         """
-        Affiche la carte dans Streamlit (`st.pydeck_chart`).
+        Calcule la couleur RGBA associée à chaque niveau de confiance.
+
+        Rouge pour une turbulence probable (confiance d’au moins
+        :attr:`SEUIL_PROBABLE` %), bleu dont l’opacité suit la confiance sinon.
+
+        :param confiance: Confiances (0 à 100) de forme *(N,)*.
+        :type confiance: numpy.ndarray
+        :return: Couleurs ``uint8`` de forme *(N, 4)*.
+        :rtype: numpy.ndarray
+        """
+        probable = confiance >= Carte.SEUIL_PROBABLE
+
+        couleurs = np.zeros((len(confiance), 4), dtype=np.uint8)
+        couleurs[probable, 0] = 255
+        couleurs[~probable, 2] = 255
+        couleurs[:, 3] = np.where(
+            probable, 160, np.clip(160 * confiance / 100, 0, 255).astype(np.uint8))
+        return couleurs
+
+    @staticmethod
+    def couleurs_rayons(points):
+        """
+        Calcule couleur RGBA et rayon de chaque zone par masques NumPy.
+
+        Le diamètre estimé est exprimé en km ; le rayon renvoyé est en mètres,
+        unité attendue par PyDeck.
 
-        - Concatène tous les DataFrames.
-        - Calcule une couleur RGBA par ligne
-          (rouge = confiance 100 %, bleu translucide sinon).
-        - Rend une seule *ScatterplotLayer* pour plus de performance.
+        :param points: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+        :type points: numpy.ndarray
+        :return: ``(couleurs, rayons)`` : ``uint8`` *(N, 4)* et ``float32`` *(N,)*.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
         """
-        dfs = [data_obj.generer_dataframe() for data_obj in self.data_objects]
-        df_all = pd.concat(dfs)
+        rayons = (points[:, 3] * 1000 / 2).astype(np.float32)
+        return Carte.couleurs_confiance(points[:, 4]), rayons
 
-        # Applique les couleurs en une fois
-        def couleur(row):
-            if row["confiance"] == 100:
-                return [255, 0, 0, 160]
-            else:
-                return [0, 0, 255, int(160 * row["confiance"] / 100)]
+    def pas_agregation(self):
+        """Pas de grille (degrés) correspondant au zoom courant."""
+        return 360 / 2 ** self.zoom * self.PIXELS_PAR_CASE / 256
 
-        df_all["color"] = df_all.apply(couleur, axis=1)
+    def agregation_active(self, n_points):
+        """Indique si ``n_points`` zones doivent être agrégées à ce zoom."""
+        return n_points > self.seuil_points and self.zoom < self.zoom_detail
 
-        # Une seule couche avec tous les points
-        layer = pdk.Layer(
+    def couche_points(self, points):
+        """*ScatterplotLayer* affichant chaque zone individuellement."""
+        couleurs, rayons = self.couleurs_rayons(points)
+
+        # Types natifs (float64/int64) : seuls sérialisables par PyDeck
+        enregistrements = pd.DataFrame({
+            "lat": points[:, 0].astype(float).round(4),
+            "lon": points[:, 1].astype(float).round(4),
+            "alt": points[:, 2].round().astype(np.int64),
+            "conf": points[:, 4].round().astype(np.int64),
+            "r": rayons.astype(float).round(1),
+            "c": couleurs.tolist(),
+        }).to_dict(orient="records")
+
+        return pdk.Layer(
             "ScatterplotLayer",
-            data=df_all,
-            get_position='[longitude, latitude]',
-            get_radius='diametre / 2',
-            get_fill_color='color',
+            data=enregistrements,
+            id="turbulences",
+            get_position='[lon, lat]',
+            get_radius='r',
+            radius_min_pixels=2,
+            get_fill_color='c',
             pickable=True,
             opacity=0.6,
             stroked=True,
             filled=True
         )
 
+    def couche_agregee(self, points):
+        """*ScatterplotLayer* d’une case par zone de grille occupée."""
+        pas = self.pas_agregation()
+        agregats = agreger_grille(points, pas)
+
+        enregistrements = pd.DataFrame({
+            "lat": agregats[:, 0].astype(float).round(3),
+            "lon": agregats[:, 1].astype(float).round(3),
+            "n": agregats[:, 2].astype(np.int64),
+            "conf": agregats[:, 3].round().astype(np.int64),
+            "fl": metres_vers_niveau_de_vol(agregats[:, 4]).round().astype(np.int64),
+            "c": self.couleurs_confiance(agregats[:, 3]).tolist(),
+        }).to_dict(orient="records")
+
+        return pdk.Layer(
+            "ScatterplotLayer",
+            data=enregistrements,
+            id="turbulences-agregees",
+            get_position='[lon, lat]',
+            get_radius=pas * KM_PAR_DEGRE * 1000 / 2,
+            get_fill_color='c',
+            pickable=True,
+            opacity=0.6,
+            stroked=True,
+            filled=True
+        )
+
+    def couche_chaleur(self):
+        """*HeatmapLayer* de la densité climatologique des turbulences."""
+        enregistrements = pd.DataFrame({
+            "lat": self.chaleur[:, 0].astype(float).round(3),
+            "lon": self.chaleur[:, 1].astype(float).round(3),
+            "w": self.chaleur[:, 2].astype(float).round(3),
+        }).to_dict(orient="records")
+
+        return pdk.Layer(
+            "HeatmapLayer",
+            data=enregistrements,
+            id="climatologie",
+            get_position='[lon, lat]',
+            get_weight='w',
+            radius_pixels=40,
+            opacity=0.5,
+        )
+
+    def construire_deck(self):
+        """
+        Construit le :class:`pydeck.Deck` des zones de turbulence.
+
+        - Concatène tous les tableaux en un seul bloc ``float32``.
+        - Selon le zoom et le nombre de zones, rend soit une zone par point
+          (:meth:`couche_points`), soit des agrégats de grille portant le
+          nombre de zones, la confiance et le niveau de vol maximaux
+          (:meth:`couche_agregee`).
+        - Couleurs et rayons sont précalculés de façon vectorisée
+          (rouge = confiance ≥ :attr:`SEUIL_PROBABLE` %, bleu translucide sinon).
+        - Ajoute dessous la carte de chaleur climatologique si ``chaleur``
+          est fourni.
+
+        :rtype: pydeck.Deck
+        """
+        points = np.vstack([data_obj.tableau() for data_obj in self.data_objects])
+
+        if self.agregation_active(len(points)):
+            layer = self.couche_agregee(points)
+            tooltip = "{n} zones\nConfiance max: {conf} %\nFL max: {fl}"
+        else:
+            layer = self.couche_points(points)
+            tooltip = "Altitude: {alt} m\nConfiance: {conf} %"
+
         view_state = pdk.ViewState(
-            latitude=df_all["latitude"].mean(),
-            longitude=df_all["longitude"].mean(),
-            zoom=3,
+            latitude=float(points[:, 0].mean()),
+            longitude=float(points[:, 1].mean()),
+            zoom=self.zoom,
             pitch=0,
             bearing=0
         )
 
-        deck = pdk.Deck(
-            layers=[layer],
+        layers = [layer]
+        if self.chaleur is not None and len(self.chaleur):
+            layers.insert(0, self.couche_chaleur())
+
+        return pdk.Deck(
+            layers=layers,
             initial_view_state=view_state,
             map_style="https://basemaps.cartocdn.com/gl/positron-gl-style/style.json",
-            tooltip={"text": "{Turbulences}\nAltitude: {altitude} m"}
+            tooltip={"text": tooltip}
         )
 
-        st.pydeck_chart(deck)
+    def affichage(self):
+        """
+        Affiche la carte dans Streamlit (`st.pydeck_chart`).
+
+        Voir :meth:`construire_deck` ; pour éviter de reconstruire la carte
+        lorsque les données n’ont pas changé, mettre en cache le résultat de
+        :meth:`construire_deck` par génération et niveau de zoom.
+        """
+        st.pydeck_chart(self.construire_deck())
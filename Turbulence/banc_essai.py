@@ -0,0 +1,162 @@
+"""
+banc_essai.py ― Mesure de bout en bout du pipeline
+==================================================
+
+Module d’essai du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+:func:`mesurer` fait tourner :meth:`main.Main.cycle` contre les simulateurs
+locaux de :mod:`serveurs_simules` et rapporte :
+
+* les centiles de latence d’un cycle (acquisition → publication) ;
+* le débit (cycles et états d’avions traités par seconde) ;
+* la mémoire (pic :mod:`tracemalloc` et croissance sur la mesure) ;
+* le nombre de cycles en échec et de cellules actives à la fin.
+
+Exemple ::
+
+    python banc_essai.py --avions 5000 --cellules 500 --cycles 40 --latence 0.05
+"""
+
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import requests
+
+from main import Main
+from requetes_meteo import OpenMeteo
+from serveurs_simules import SimulateurOpenMeteo, SimulateurOpenSky
+
+
+CENTILES = (50, 90, 99)
+
+
+def cellules_initiales(n, graine=0):
+    """
+    Tire ``n`` cellules actives synthétiques ``[lat, lon, alt, diam, confiance]``.
+
+    :rtype: numpy.ndarray
+    """
+    rng = np.random.default_rng(graine)
+    return np.column_stack((rng.uniform(-60, 70, n), rng.uniform(-180, 180, n),
+                            rng.uniform(3000, 12500, n), rng.uniform(5, 50, n),
+                            rng.uniform(20, 100, n)))
+
+
+def mesurer(n_avions=1000, n_cellules=200, cycles=30, echauffement=5, latence=0.0,
+            gigue=0.0, taux_erreur=0.0, cache_froid=True, graine=0):
+    """
+    Mesure la latence, le débit et la mémoire de :meth:`main.Main.cycle`.
+
+    Les ``echauffement`` premiers cycles remplissent la fenêtre du détecteur
+    et ne sont pas comptés.
+
+    :param n_avions: Nombre d’avions simulés par OpenSky.
+    :type n_avions: int
+    :param n_cellules: Nombre de cellules actives injectées avant la mesure.
+    :type n_cellules: int
+    :param cycles: Nombre de cycles mesurés.
+    :type cycles: int
+    :param echauffement: Nombre de cycles non mesurés au départ.
+    :type echauffement: int
+    :param latence: Latence moyenne des simulateurs (s).
+    :type latence: float
+    :param gigue: Écart type de la latence (s).
+    :type gigue: float
+    :param taux_erreur: Probabilité d’échec de chaque requête simulée.
+    :type taux_erreur: float
+    :param cache_froid: Vide le cache des vents avant la mesure.
+    :type cache_froid: bool
+    :param graine: Graine commune des simulateurs et des cellules.
+    :type graine: int
+    :return: Résultats de la mesure (latences en secondes, mémoire en octets).
+    :rtype: dict
+    """
+    options = dict(latence=latence, gigue=gigue, taux_erreur=taux_erreur, graine=graine)
+    with SimulateurOpenSky(n_avions=n_avions, **options) as opensky, \
+            SimulateurOpenMeteo(**options) as meteo:
+        collecteur = Main(periode=0, url_opensky=opensky.url_etats,
+                          url_token=opensky.url_jeton, url_meteo=meteo.url_prevision)
+        if cache_froid:
+            OpenMeteo.vider_cache()
+
+        echecs = 0
+
+        def cycle():
+            nonlocal echecs
+            try:
+                # Le détecteur affiche un compte rendu à chaque mise à jour
+                with contextlib.redirect_stdout(io.StringIO()):
+                    collecteur.cycle()
+            except (requests.RequestException, KeyError, ValueError):
+                echecs += 1
+
+        for _ in range(echauffement):
+            cycle()
+        collecteur.ajouter_cellules(cellules_initiales(n_cellules, graine))
+        echecs = 0
+
+        tracemalloc.start()
+        memoire_debut = tracemalloc.get_traced_memory()[0]
+        durees = np.empty(cycles)
+        debut = time.perf_counter()
+        for k in range(cycles):
+            t0 = time.perf_counter()
+            cycle()
+            durees[k] = time.perf_counter() - t0
+        total = time.perf_counter() - debut
+        memoire_fin, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        resultats = {f"p{c}": float(np.percentile(durees, c)) for c in CENTILES}
+        resultats.update(
+            moyenne=float(durees.mean()),
+            maximum=float(durees.max()),
+            cycles_par_s=cycles / total,
+            etats_par_s=cycles * n_avions / total,
+            memoire_pic=pic,
+            memoire_croissance=memoire_fin - memoire_debut,
+            echecs=echecs,
+            cellules_finales=len(collecteur.turbulences_actives),
+            requetes_opensky=opensky.requetes,
+            requetes_meteo=meteo.requetes,
+        )
+    return resultats
+
+
+def afficher(resultats):
+    """Affiche les résultats de :func:`mesurer` sous forme de tableau."""
+    print(f"{'latence p50':<22}{resultats['p50'] * 1000:>12.1f} ms")
+    print(f"{'latence p90':<22}{resultats['p90'] * 1000:>12.1f} ms")
+    print(f"{'latence p99':<22}{resultats['p99'] * 1000:>12.1f} ms")
+    print(f"{'latence max':<22}{resultats['maximum'] * 1000:>12.1f} ms")
+    print(f"{'débit':<22}{resultats['cycles_par_s']:>12.2f} cycles/s")
+    print(f"{'états traités':<22}{resultats['etats_par_s']:>12.0f} /s")
+    print(f"{'mémoire (pic)':<22}{resultats['memoire_pic'] / 2**20:>12.1f} Mio")
+    print(f"{'mémoire (croissance)':<22}{resultats['memoire_croissance'] / 2**20:>12.1f} Mio")
+    print(f"{'cycles en échec':<22}{resultats['echecs']:>12d}")
+    print(f"{'cellules finales':<22}{resultats['cellules_finales']:>12d}")
+    print(f"{'requêtes météo':<22}{resultats['requetes_meteo']:>12d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Banc d'essai du pipeline contre des API simulées.")
+    parser.add_argument("--avions", type=int, default=1000, help="nombre d'avions simulés")
+    parser.add_argument("--cellules", type=int, default=200, help="cellules actives injectées")
+    parser.add_argument("--cycles", type=int, default=30, help="nombre de cycles mesurés")
+    parser.add_argument("--latence", type=float, default=0.0, help="latence moyenne (s)")
+    parser.add_argument("--gigue", type=float, default=0.0, help="écart type de la latence (s)")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="probabilité d'erreur 503")
+    parser.add_argument("--cache-chaud", action="store_true",
+                        help="conserve le cache des vents entre deux mesures")
+    parser.add_argument("--graine", type=int, default=0, help="graine aléatoire")
+    args = parser.parse_args()
+
+    afficher(mesurer(args.avions, args.cellules, args.cycles, latence=args.latence,
+                     gigue=args.gigue, taux_erreur=args.taux_erreur,
+                     cache_froid=not args.cache_chaud, graine=args.graine))
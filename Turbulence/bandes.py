@@ -0,0 +1,117 @@
+"""
+bandes.py ― Partition des cellules par bande d’altitude
+=======================================================
+
+Module de traitement du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Les vents d’Open-Meteo ne sont disponibles qu’aux niveaux de pression de
+:attr:`requetes_meteo.OpenMeteo.niveaux_possibles`. Chaque cellule est
+rattachée au niveau le plus proche de son altitude (atmosphère ISA) : sa
+**bande**.
+
+Les cellules actives sont conservées **triées par bande**, avec le tableau
+des débuts de bande ``debuts`` (longueur ``NB_BANDES + 1``) : la bande
+``k`` occupe la tranche contiguë ``debuts[k]:debuts[k + 1]``. Requêtes
+météo, advection et filtrage par niveau ne parcourent ainsi que les
+données d’une bande.
+"""
+
+
+import numpy as np
+
+from geodesie import (altitude_vers_hpa, hpa_vers_altitude, metres_vers_niveau_de_vol,
+                      niveau_de_vol_vers_metres)
+from requetes_meteo import OpenMeteo
+
+
+NIVEAUX_HPA = OpenMeteo.niveaux_possibles
+NB_BANDES = len(NIVEAUX_HPA)
+
+
+def indice_bande(altitude_m):
+    """
+    Bande (indice dans :data:`NIVEAUX_HPA`) du niveau de pression le plus
+    proche de chaque altitude.
+
+    :rtype: numpy.ndarray
+    """
+    pression = np.atleast_1d(altitude_vers_hpa(altitude_m))
+    return np.abs(NIVEAUX_HPA[None, :] - pression[:, None]).argmin(axis=1)
+
+
+def bande_du_niveau_de_vol(niveau_de_vol):
+    """Bande correspondant à un niveau de vol (centaines de pieds), p. ex. ``350``."""
+    return int(indice_bande(niveau_de_vol_vers_metres(niveau_de_vol))[0])
+
+
+def niveau_de_vol(bande):
+    """Niveau de vol (centaines de pieds) du niveau de pression d’une bande."""
+    return int(round(float(metres_vers_niveau_de_vol(hpa_vers_altitude(NIVEAUX_HPA[bande])))))
+
+
+def libelle(bande):
+    """Libellé lisible d’une bande, p. ex. ``"FL340 (250 hPa)"``."""
+    return f"FL{niveau_de_vol(bande):03d} ({NIVEAUX_HPA[bande]} hPa)"
+
+
+def debuts_bandes(cellules):
+    """
+    Débuts de bande d’un tableau de cellules déjà trié par bande.
+
+    :param cellules: Tableau *(N, 5)* trié par :func:`trier_par_bande`.
+    :type cellules: numpy.ndarray
+    :return: Tableau ``int64`` de longueur ``NB_BANDES + 1``.
+    :rtype: numpy.ndarray
+    """
+    bandes = indice_bande(np.asarray(cellules)[:, 2]) if len(cellules) else np.empty(0, dtype=np.int64)
+    return np.searchsorted(bandes, np.arange(NB_BANDES + 1), side="left")
+
+
+def trier_par_bande(cellules, *alignes):
+    """
+    Trie des cellules par bande ; les tableaux alignés suivent la même permutation.
+
+    Le tri est stable : l’ordre d’origine est conservé à l’intérieur de
+    chaque bande.
+
+    :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+    :type cellules: numpy.ndarray
+    :param alignes: Tableaux de longueur N à permuter de la même façon
+        (identifiants, échéances…).
+    :return: ``(cellules, alignes, debuts)``.
+    :rtype: tuple[numpy.ndarray, list[numpy.ndarray], numpy.ndarray]
+    """
+    cellules = np.asarray(cellules)
+    bandes = indice_bande(cellules[:, 2]) if len(cellules) else np.empty(0, dtype=np.int64)
+    ordre = np.argsort(bandes, kind="stable")
+    debuts = np.searchsorted(bandes[ordre], np.arange(NB_BANDES + 1), side="left")
+    return cellules[ordre], [np.asarray(a)[ordre] for a in alignes], debuts
+
+
+def tranche(debuts, bande):
+    """Tranche ``slice`` d’une bande dans un tableau trié."""
+    return slice(int(debuts[bande]), int(debuts[bande + 1]))
+
+
+def bandes_occupees(debuts):
+    """Indices des bandes non vides."""
+    return np.nonzero(np.diff(debuts))[0]
+
+
+def masque_zone(cellules, lat=None, lon=None):
+    """
+    Masque des cellules situées dans une zone ``lat = (min, max)``, ``lon = (min, max)``.
+
+    Si ``lon[0] > lon[1]``, la zone franchit l’antiméridien.
+
+    :rtype: numpy.ndarray
+    """
+    masque = np.ones(len(cellules), dtype=bool)
+    if lat is not None:
+        masque &= (cellules[:, 0] >= lat[0]) & (cellules[:, 0] <= lat[1])
+    if lon is not None:
+        dedans = (cellules[:, 1] >= lon[0]) & (cellules[:, 1] <= lon[1])
+        if lon[0] > lon[1]:
+            dedans = (cellules[:, 1] >= lon[0]) | (cellules[:, 1] <= lon[1])
+        masque &= dedans
+    return masque
@@ -0,0 +1,240 @@
+"""
+calibration.py ― Balayage vectorisé des seuils de détection
+===========================================================
+
+Module d’analyse du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Les seuils de :class:`turbulence.TurbulenceDetector` (saut de 10 m/s,
+mouvements de 12 / 15 m/s, 2 inversions, 3 ticks de confirmation, 2 ticks
+de libération) sont des heuristiques. :func:`calibrer` rejoue du trafic
+enregistré pour **toute une grille de configurations à la fois** :
+
+1. **Matrice** *(avions × ticks)* des ``vertical_rate``
+   (:func:`matrice_vitesses`), ``NaN`` lorsque l’avion est absent.
+2. **Critères** calculés une seule fois sur les fenêtres glissantes
+   (:func:`numpy.lib.stride_tricks.sliding_window_view`) : plus grand saut,
+   mouvement cumulé et nombre d’inversions de direction.
+3. **Instabilité** diffusée sur *(configurations × avions × ticks)*, par
+   blocs de ticks pour borner la mémoire.
+4. **Automate** confirmation / libération rejoué tick par tick pour toutes
+   les configurations et tous les avions en une opération NumPy.
+
+Exemple ::
+
+    grille = grille_configurations(seuil_saut=[6, 8, 10, 12], ticks_confirmation=[2, 3, 4])
+    resultats = calibrer(matrice_vitesses(etats)[1], grille)
+    TurbulenceDetector(**parametres_detecteur(resultats, resultats["evenements"].argmax()))
+"""
+
+
+import itertools
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from turbulence import TurbulenceDetector
+
+
+# Seuils réglables de TurbulenceDetector, balayés par grille_configurations
+PARAMETRES = ("seuil_saut", "seuil_oscillation", "seuil_inversion",
+              "inversions_min", "ticks_confirmation", "ticks_liberation")
+PARAMETRES_ENTIERS = ("inversions_min", "ticks_confirmation", "ticks_liberation")
+
+
+def matrice_vitesses(etats):
+    """
+    Construit la matrice *(A, T)* des ``vertical_rate`` d’une suite de ticks.
+
+    :param etats: DataFrames successifs renvoyés par
+        :meth:`requetes_opensky.OpenSky.get_json` (colonnes ``nom`` et
+        ``vertical_rate``).
+    :type etats: list[pandas.DataFrame]
+    :return: ``(noms, matrice)`` : noms des avions et vitesses verticales,
+        ``NaN`` aux ticks où l’avion est absent.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    noms_par_tick = [np.asarray(df["nom"]) for df in etats]
+    noms, inverses = np.unique(np.concatenate(noms_par_tick), return_inverse=True)
+    ticks = np.repeat(np.arange(len(etats)), [len(n) for n in noms_par_tick])
+
+    matrice = np.full((len(noms), len(etats)), np.nan)
+    matrice[inverses, ticks] = np.concatenate(
+        [np.asarray(df["vertical_rate"], dtype=float) for df in etats])
+    return noms, matrice
+
+
+def grille_configurations(**plages):
+    """
+    Produit cartésien des valeurs de seuils à évaluer.
+
+    Les paramètres absents gardent la valeur par défaut de
+    :class:`turbulence.TurbulenceDetector`.
+
+    :param plages: Valeurs à balayer, par nom de paramètre (voir :data:`PARAMETRES`).
+    :return: Un tableau *(C,)* par paramètre.
+    :rtype: dict[str, numpy.ndarray]
+    :raises ValueError: Si un paramètre est inconnu.
+    """
+    inconnus = set(plages) - set(PARAMETRES)
+    if inconnus:
+        raise ValueError(f"Paramètres inconnus : {sorted(inconnus)}")
+
+    defaut = TurbulenceDetector()
+    valeurs = [np.atleast_1d(plages.get(nom, getattr(defaut, nom))) for nom in PARAMETRES]
+    combinaisons = np.array(list(itertools.product(*valeurs)), dtype=float).reshape(-1, len(PARAMETRES))
+    return {nom: combinaisons[:, k].astype(int) if nom in PARAMETRES_ENTIERS else combinaisons[:, k]
+            for k, nom in enumerate(PARAMETRES)}
+
+
+def criteres_fenetres(vitesses, fenetre=5):
+    """
+    Critères d’instabilité de chaque fenêtre glissante, indépendants des seuils.
+
+    Reproduit :meth:`turbulence.TurbulenceDetector.instabilite_detectee` :
+    les variations nulles sont ignorées pour compter les inversions.
+
+    :param vitesses: Matrice *(A, T)* des vitesses verticales.
+    :type vitesses: numpy.ndarray
+    :param fenetre: Nombre de ticks par fenêtre.
+    :type fenetre: int
+    :return: ``(saut, mouvement, inversions, valide)``, tableaux *(A, W)*
+        avec ``W = T - fenetre + 1`` ; la fenêtre ``w`` se termine au tick
+        ``w + fenetre - 1``.
+    :rtype: tuple[numpy.ndarray, ...]
+    """
+    fenetres = sliding_window_view(np.asarray(vitesses, dtype=float), fenetre, axis=1)
+    valide = ~np.isnan(fenetres).any(axis=2)
+    diffs = np.nan_to_num(np.diff(fenetres, axis=2))
+
+    saut = np.abs(diffs).max(axis=2)
+    mouvement = np.abs(diffs).sum(axis=2)
+
+    # Signe de la dernière variation non nulle (0 tant qu'il n'y en a pas)
+    signes = np.sign(diffs)
+    rang = np.arange(signes.shape[2])
+    dernier = np.maximum.accumulate(np.where(signes != 0, rang, -1), axis=2)
+    propages = np.where(dernier >= 0, np.take_along_axis(signes, np.maximum(dernier, 0), axis=2), 0)
+    inversions = ((propages[..., 1:] != propages[..., :-1])
+                  & (propages[..., :-1] != 0)).sum(axis=2)
+    return saut, mouvement, inversions, valide
+
+
+def calibrer(vitesses, configurations, fenetre=5, budget_octets=256 * 2**20):
+    """
+    Rejoue l’automate de détection pour toutes les configurations à la fois.
+
+    Un avion qui disparaît (fenêtre incomplète) perd son état, comme dans
+    :meth:`turbulence.TurbulenceDetector.update`.
+
+    :param vitesses: Matrice *(A, T)* issue de :func:`matrice_vitesses`.
+    :type vitesses: numpy.ndarray
+    :param configurations: Grille issue de :func:`grille_configurations`.
+    :type configurations: dict[str, numpy.ndarray]
+    :param fenetre: Taille de la fenêtre glissante (``window_size``).
+    :type fenetre: int
+    :param budget_octets: Taille maximale du bloc *(C, A, ticks)* d’instabilité.
+    :type budget_octets: int
+    :return: Les paramètres de la grille, complétés pour chaque
+        configuration *(C,)* par :
+
+        * ``evenements`` – turbulences clôturées ;
+        * ``avions_touches`` – avions ayant produit au moins un événement ;
+        * ``duree_moyenne`` – durée moyenne (ticks) d’un événement clôturé ;
+        * ``avortees`` – instabilités provisoires annulées avant confirmation ;
+        * ``fraction_turbulente`` – part des ticks valides passés en turbulence ;
+        * ``basculements`` – changements stable ↔ instable par tick valide ;
+        * ``en_cours`` – turbulences non clôturées à la fin de l’enregistrement.
+    :rtype: dict[str, numpy.ndarray]
+    """
+    saut, mouvement, inversions, valide = criteres_fenetres(vitesses, fenetre)
+    a, w = saut.shape
+    cfg = {nom: np.asarray(valeurs)[:, None, None] for nom, valeurs in configurations.items()}
+    c = len(configurations["seuil_saut"])
+    confirmation = cfg["ticks_confirmation"][:, :, 0]
+    liberation = cfg["ticks_liberation"][:, :, 0]
+
+    # État de l'automate, (C, A)
+    provisoire = np.zeros((c, a), dtype=np.int64)
+    debut_provisoire = np.zeros((c, a), dtype=np.int64)
+    en_cours = np.zeros((c, a), dtype=bool)
+    stables = np.zeros((c, a), dtype=np.int64)
+    debut = np.zeros((c, a), dtype=np.int64)
+    precedent = np.zeros((c, a), dtype=bool)
+
+    # Compteurs
+    evenements = np.zeros((c, a), dtype=np.int64)
+    duree_totale = np.zeros(c, dtype=np.int64)
+    avortees = np.zeros(c, dtype=np.int64)
+    ticks_turbulents = np.zeros(c, dtype=np.int64)
+    basculements = np.zeros(c, dtype=np.int64)
+
+    taille_bloc = max(1, budget_octets // max(c * a, 1))
+    for bloc in range(0, w, taille_bloc):
+        tranche = slice(bloc, bloc + taille_bloc)
+        instables = ((saut[None, :, tranche] >= cfg["seuil_saut"])
+                     | ((inversions[None, :, tranche] >= cfg["inversions_min"])
+                        & (mouvement[None, :, tranche] > cfg["seuil_oscillation"]))
+                     | ((inversions[None, :, tranche] >= 1)
+                        & (inversions[None, :, tranche] < cfg["inversions_min"])
+                        & (mouvement[None, :, tranche] > cfg["seuil_inversion"])))
+
+        for k, t in enumerate(range(tranche.start, min(tranche.stop, w))):
+            present = valide[:, t]
+            instable = instables[:, :, k] & present
+            basculements += ((instable != precedent) & present).sum(axis=1)
+            precedent = instable
+
+            # Turbulence confirmée : libération après assez de ticks stables
+            confirme = en_cours & present
+            stables = np.where(confirme & instable, 0, stables + (confirme & ~instable))
+            fin = confirme & (stables >= liberation)
+            evenements += fin
+            duree_totale += np.where(fin, t - debut, 0).sum(axis=1)
+            en_cours &= ~fin
+            stables[fin] = 0
+
+            # Instabilité provisoire : confirmation après assez de ticks instables
+            libre = ~confirme & present
+            nouveau = libre & instable & (provisoire == 0)
+            debut_provisoire[nouveau] = t
+            avortees += (libre & ~instable & (provisoire > 0)).sum(axis=1)
+            provisoire = np.where(libre, np.where(instable, provisoire + 1, 0), provisoire)
+            confirmation_atteinte = libre & (provisoire >= confirmation)
+            en_cours |= confirmation_atteinte
+            debut = np.where(confirmation_atteinte, debut_provisoire, debut)
+            provisoire[confirmation_atteinte] = 0
+            ticks_turbulents += en_cours.sum(axis=1)
+
+            # Avion absent : état perdu
+            absent = ~present
+            provisoire[:, absent] = 0
+            en_cours[:, absent] = False
+            stables[:, absent] = 0
+            precedent[:, absent] = False
+
+    total_evenements = evenements.sum(axis=1)
+    ticks_valides = max(int(valide.sum()), 1)
+    resultats = {nom: np.asarray(valeurs) for nom, valeurs in configurations.items()}
+    resultats.update(
+        evenements=total_evenements,
+        avions_touches=(evenements > 0).sum(axis=1),
+        duree_moyenne=duree_totale / np.maximum(total_evenements, 1),
+        avortees=avortees,
+        fraction_turbulente=ticks_turbulents / ticks_valides,
+        basculements=basculements / ticks_valides,
+        en_cours=en_cours.sum(axis=1),
+    )
+    return resultats
+
+
+def parametres_detecteur(resultats, indice):
+    """
+    Paramètres d’une configuration, prêts pour :class:`turbulence.TurbulenceDetector`.
+
+    :param resultats: Sortie de :func:`calibrer` (ou de :func:`grille_configurations`).
+    :type resultats: dict[str, numpy.ndarray]
+    :param indice: Indice de la configuration retenue.
+    :type indice: int
+    :rtype: dict
+    """
+    return {nom: resultats[nom][indice].item() for nom in PARAMETRES}
@@ -0,0 +1,163 @@
+"""
+climatologie.py ― Densité mondiale des turbulences signalées
+============================================================
+
+Module d’analyse du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+:class:`RasterDensite` accumule, lot après lot, les turbulences confirmées
+par :class:`turbulence.TurbulenceDetector` dans un histogramme NumPy
+*latitude × longitude × tranche d’altitude*. Chaque horizon (1 h, 24 h,
+7 j par défaut) applique sa propre décroissance exponentielle.
+
+Pour que la mise à jour reste en *O(événements)*, la décroissance est
+paresseuse : un événement survenu à ``t`` est ajouté avec le poids
+``exp((t - t_ref) / tau)`` et la densité à l’instant ``t`` vaut
+``grille * exp(-(t - t_ref) / tau)``. La grille n’est renormalisée
+entièrement que lorsque ces poids deviennent trop grands.
+"""
+
+
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class RasterDensite:
+    """
+    Histogramme glissant des turbulences, à décroissance exponentielle.
+
+    Parameters
+    ----------
+    pas_deg : float, default ``1.0``
+        Côté d’une case en degrés.
+    bornes_alt : array-like, default ``0, 2000, …, 16000``
+        Bornes (m) des tranches d’altitude.
+    horizons : tuple[float, ...], default ``(3600, 86400, 604800)``
+        Constantes de temps (s) de la décroissance, une grille par horizon.
+    fichier : str | None, optional
+        Fichier ``.npz`` de sauvegarde ; rechargé s’il existe.
+    periode_sauvegarde : float, default ``300``
+        Délai minimal (s) entre deux sauvegardes automatiques.
+
+    Attributes
+    ----------
+    grilles : numpy.ndarray
+        Accumulateurs ``float32`` *(n_horizons, n_lat, n_lon, n_tranches)*,
+        exprimés relativement à ``t_ref``.
+    t_ref : float
+        Instant de référence de la décroissance paresseuse.
+    """
+
+    # Exposant au-delà duquel la grille est renormalisée (e**30 ≈ 1e13)
+    EXPOSANT_MAX = 30.0
+
+    def __init__(self, pas_deg=1.0, bornes_alt=np.arange(0, 16001, 2000),
+                 horizons=(3600, 86400, 604800), fichier=None, periode_sauvegarde=300):
+        self.pas_deg = pas_deg
+        self.bornes_alt = np.asarray(bornes_alt, dtype=float)
+        self.horizons = np.asarray(horizons, dtype=float)
+        self.fichier = fichier
+        self.periode_sauvegarde = periode_sauvegarde
+
+        self.n_lat = int(round(180 / pas_deg))
+        self.n_lon = int(round(360 / pas_deg))
+        n_tranches = len(self.bornes_alt) - 1
+        self.grilles = np.zeros((len(self.horizons), self.n_lat, self.n_lon, n_tranches),
+                                dtype=np.float32)
+        self.t_ref = time.time()
+        self._derniere_sauvegarde = self.t_ref
+        self.lock = threading.Lock()
+
+        if fichier and os.path.exists(fichier):
+            self.charger()
+
+    def _indices(self, cellules):
+        i_lat = np.clip(((cellules[:, 0] + 90) / self.pas_deg).astype(np.int64), 0, self.n_lat - 1)
+        i_lon = ((cellules[:, 1] + 180) / self.pas_deg).astype(np.int64) % self.n_lon
+        i_alt = np.clip(np.searchsorted(self.bornes_alt, cellules[:, 2], side="right") - 1,
+                        0, self.grilles.shape[3] - 1)
+        return i_lat, i_lon, i_alt
+
+    def _renormaliser(self, horodatage):
+        """Ramène ``t_ref`` à ``horodatage`` (coût O(grille), rare)."""
+        facteurs = np.exp(-(horodatage - self.t_ref) / self.horizons)
+        self.grilles *= facteurs[:, None, None, None].astype(np.float32)
+        self.t_ref = horodatage
+
+    def ajouter(self, cellules, horodatage=None):
+        """
+        Ajoute un lot de turbulences à toutes les grilles.
+
+        :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+        :type cellules: numpy.ndarray
+        :param horodatage: Instant du lot (secondes epoch) ; maintenant par défaut.
+        :type horodatage: float, optional
+        """
+        horodatage = horodatage or time.time()
+        if len(cellules):
+            with self.lock:
+                if (horodatage - self.t_ref) / self.horizons.min() > self.EXPOSANT_MAX:
+                    self._renormaliser(horodatage)
+
+                i_lat, i_lon, i_alt = self._indices(np.asarray(cellules))
+                poids = np.exp((horodatage - self.t_ref) / self.horizons)
+                for h, w in enumerate(poids):
+                    np.add.at(self.grilles[h], (i_lat, i_lon, i_alt), np.float32(w))
+
+        if self.fichier and horodatage - self._derniere_sauvegarde >= self.periode_sauvegarde:
+            self.sauvegarder()
+
+    def densite(self, horizon, horodatage=None):
+        """
+        Renvoie la densité décroissante pour un horizon donné.
+
+        :param horizon: Indice de l’horizon dans ``horizons``.
+        :type horizon: int
+        :param horodatage: Instant d’évaluation ; maintenant par défaut.
+        :type horodatage: float, optional
+        :return: Grille ``float32`` *(n_lat, n_lon, n_tranches)*.
+        :rtype: numpy.ndarray
+        """
+        horodatage = horodatage or time.time()
+        with self.lock:
+            facteur = np.exp(-(horodatage - self.t_ref) / self.horizons[horizon])
+            return self.grilles[horizon] * np.float32(facteur)
+
+    def points_chaleur(self, horizon, tranche=None, horodatage=None):
+        """
+        Liste les cases non vides, prêtes pour une *HeatmapLayer*.
+
+        :param horizon: Indice de l’horizon dans ``horizons``.
+        :type horizon: int
+        :param tranche: Indice de tranche d’altitude ; toutes si ``None``.
+        :type tranche: int, optional
+        :return: Tableau *(M, 3)* ``[lat, lon, poids]`` (centres de cases).
+        :rtype: numpy.ndarray
+        """
+        grille = self.densite(horizon, horodatage)
+        grille = grille.sum(axis=2) if tranche is None else grille[:, :, tranche]
+        i_lat, i_lon = np.nonzero(grille > 1e-3)
+        return np.column_stack(((i_lat + 0.5) * self.pas_deg - 90,
+                                (i_lon + 0.5) * self.pas_deg - 180,
+                                grille[i_lat, i_lon]))
+
+    def sauvegarder(self):
+        """Écrit les grilles dans ``fichier`` (remplacement atomique)."""
+        with self.lock:
+            grilles, t_ref = self.grilles.copy(), self.t_ref
+        provisoire = self.fichier + ".tmp.npz"
+        np.savez(provisoire, grilles=grilles, t_ref=t_ref, pas_deg=self.pas_deg,
+                 bornes_alt=self.bornes_alt, horizons=self.horizons)
+        os.replace(provisoire, self.fichier)
+        self._derniere_sauvegarde = time.time()
+
+    def charger(self):
+        """Recharge les grilles depuis ``fichier`` si sa géométrie est identique."""
+        with np.load(self.fichier) as archive:
+            if (archive["grilles"].shape == self.grilles.shape
+                    and np.array_equal(archive["horizons"], self.horizons)
+                    and np.array_equal(archive["bornes_alt"], self.bornes_alt)):
+                self.grilles = archive["grilles"].astype(np.float32)
+                self.t_ref = float(archive["t_ref"])
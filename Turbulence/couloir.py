@@ -0,0 +1,152 @@
+"""
+couloir.py ― Turbulences le long d’une route
+============================================
+
+Module de requête du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Permet de répondre à la question : *quelles cellules turbulentes actives
+se trouvent à moins de X km de ce plan de vol, à ses niveaux de croisière ?*
+
+* :class:`IndexCellules` – index spatial en grille (clés de case triées)
+  construit une fois par publication et réutilisable pour de nombreuses
+  routes.
+* :meth:`IndexCellules.route` – distances point-segment géodésiques
+  (:func:`geodesie.distance_point_segment`), calculées en bloc pour tous
+  les couples cellule × segment candidats.
+"""
+
+
+import numpy as np
+
+from geodesie import (RAYON_TERRE_KM, distance_point_segment, latitudes_extremes,
+                      metres_vers_niveau_de_vol)
+
+
+class IndexCellules:
+    """
+    Index spatial en grille des cellules turbulentes actives.
+
+    Parameters
+    ----------
+    cellules : numpy.ndarray
+        Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+    pas_deg : float, default ``1.0``
+        Côté d’une case de l’index, en degrés.
+
+    Attributes
+    ----------
+    ordre : numpy.ndarray
+        Indices des cellules triées par clé de case.
+    cles : numpy.ndarray
+        Clés de case triées (``i_lat * n_lon + i_lon``).
+    """
+
+    def __init__(self, cellules, pas_deg=1.0):
+        self.cellules = np.asarray(cellules, dtype=float).reshape(-1, 5)
+        self.pas_deg = pas_deg
+        self.n_lon = int(round(360 / pas_deg))
+        self.n_lat = int(round(180 / pas_deg))
+
+        i_lat = np.clip(((self.cellules[:, 0] + 90) / pas_deg).astype(np.int64), 0, self.n_lat - 1)
+        i_lon = ((self.cellules[:, 1] + 180) / pas_deg).astype(np.int64) % self.n_lon
+        cles = i_lat * self.n_lon + i_lon
+        self.ordre = np.argsort(cles, kind="stable")
+        self.cles = cles[self.ordre]
+
+    def candidats(self, lat_min, lat_max, lon_min, lon_max):
+        """
+        Renvoie les indices des cellules situées dans les cases d’une zone.
+
+        Les longitudes peuvent déborder de ``[-180, 180]`` (antiméridien).
+
+        :rtype: numpy.ndarray
+        """
+        l0 = max(int((lat_min + 90) // self.pas_deg), 0)
+        l1 = min(int((lat_max + 90) // self.pas_deg), self.n_lat - 1)
+        c0 = int((lon_min + 180) // self.pas_deg)
+        c1 = int((lon_max + 180) // self.pas_deg)
+
+        if c1 - c0 + 1 >= self.n_lon:
+            plages = [(0, self.n_lon - 1)]
+        elif c0 % self.n_lon <= c1 % self.n_lon:
+            plages = [(c0 % self.n_lon, c1 % self.n_lon)]
+        else:
+            plages = [(c0 % self.n_lon, self.n_lon - 1), (0, c1 % self.n_lon)]
+
+        lignes = np.arange(l0, l1 + 1) * self.n_lon
+        bornes = [(lignes + a, lignes + b) for a, b in plages]
+        debuts = np.concatenate([np.searchsorted(self.cles, a, "left") for a, _ in bornes])
+        fins = np.concatenate([np.searchsorted(self.cles, b, "right") for _, b in bornes])
+        if not len(debuts):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.ordre[d:f] for d, f in zip(debuts, fins)])
+
+    def route(self, waypoints, rayon_km=50.0, tolerance_fl=20):
+        """
+        Cherche les cellules proches d’une route à ses niveaux de vol.
+
+        Le niveau de vol de la route est interpolé linéairement le long de
+        chaque segment ; une cellule n’est retenue que si son niveau
+        (altitude convertie en FL) en est à moins de ``tolerance_fl``.
+
+        :param waypoints: Tableau *(M, 3)* ``[lat, lon, niveau_de_vol]``, M ≥ 2.
+        :type waypoints: numpy.ndarray
+        :param rayon_km: Demi-largeur du couloir (km).
+        :type rayon_km: float
+        :param tolerance_fl: Écart de niveau de vol admis (centaines de pieds).
+        :type tolerance_fl: float
+        :return: ``(indices, distance_laterale_km, distance_parcours_km)``,
+            triés selon la distance parcourue depuis le premier point.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+
+        Examples
+        --------
+        Cellule au sommet d’un long segment, hors du rectangle de ses extrémités :
+
+        >>> index = IndexCellules([[53.99, -30.0, 10668, 10, 80]])
+        >>> indices, laterale, parcours = index.route([[50, -60, 350], [50, 0, 350]], 50, 20)
+        >>> indices.tolist(), laterale.round(1).tolist(), parcours.round(0).tolist()
+        ([0], [0.5], [2085.0])
+        """
+        wp = np.asarray(waypoints, dtype=float)
+        marge_lat = np.degrees(rayon_km / RAYON_TERRE_KM)
+
+        # 1) Filtrage par l'index : cases touchées par l'emprise de chaque segment.
+        #    L'orthodromie s'écarte vers le pôle entre ses extrémités : l'emprise
+        #    en latitude va jusqu'à son sommet. La longitude d'arrivée est
+        #    déroulée pour les segments qui franchissent l'antiméridien.
+        lat_min, lat_max = latitudes_extremes(wp[:-1, 0], wp[:-1, 1], wp[1:, 0], wp[1:, 1])
+        lat_min, lat_max = lat_min - marge_lat, lat_max + marge_lat
+        marge_lon = marge_lat / np.maximum(
+            np.cos(np.radians(np.minimum(np.maximum(np.abs(lat_min), np.abs(lat_max)), 90))), 1e-6)
+        lon_arrivee = wp[:-1, 1] + (wp[1:, 1] - wp[:-1, 1] + 180) % 360 - 180
+        lon_min = np.minimum(wp[:-1, 1], lon_arrivee) - marge_lon
+        lon_max = np.maximum(wp[:-1, 1], lon_arrivee) + marge_lon
+        candidats = np.unique(np.concatenate([
+            self.candidats(*bornes) for bornes in zip(lat_min, lat_max, lon_min, lon_max)]))
+        vide = np.empty(0)
+        if not len(candidats):
+            return candidats, vide, vide
+
+        # 2) Distances point-segment pour tous les couples (cellule, segment)
+        distance, abscisse, longueur = distance_point_segment(
+            self.cellules[candidats, 0, None], self.cellules[candidats, 1, None],
+            wp[:-1, 0], wp[:-1, 1], wp[1:, 0], wp[1:, 1])
+
+        # 3) Niveau de vol de la route au point le plus proche de chaque segment
+        t = np.divide(abscisse, longueur, out=np.zeros_like(abscisse), where=longueur > 0)
+        fl_route = wp[:-1, 2] + t * (wp[1:, 2] - wp[:-1, 2])
+        fl_cellule = metres_vers_niveau_de_vol(self.cellules[candidats, 2, None])
+        distance[np.abs(fl_cellule - fl_route) > tolerance_fl] = np.inf
+
+        # 4) Meilleur segment par cellule, puis sélection dans le couloir
+        meilleur = distance.argmin(axis=1)
+        lignes = np.arange(len(candidats))
+        distance_laterale = distance[lignes, meilleur]
+        cumul = np.concatenate(([0.0], np.cumsum(longueur[0])))[:-1]
+        parcours = cumul[meilleur] + abscisse[lignes, meilleur]
+
+        dans_couloir = distance_laterale <= rayon_km
+        tri = np.argsort(parcours[dans_couloir], kind="stable")
+        return (candidats[dans_couloir][tri], distance_laterale[dans_couloir][tri],
+                parcours[dans_couloir][tri])
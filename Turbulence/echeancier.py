@@ -0,0 +1,106 @@
+"""
+echeancier.py ― Échéances des cellules turbulentes
+==================================================
+
+Module de traitement du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+:class:`Echeancier` attribue à chaque cellule une durée de vie (heure
+murale) et retrouve les cellules expirées sans parcourir toutes les
+cellules actives : les échéances sont rangées dans un tas binaire
+(:mod:`heapq`) de couples ``(echeance, identifiant)``.
+
+Les cellules retirées avant leur échéance (évincées ou disparues à
+l’advection) ne sont pas cherchées dans le tas : elles sont simplement
+oubliées du dictionnaire ``echeances`` et leur entrée est ignorée lorsqu’elle
+remonte au sommet (suppression paresseuse).
+"""
+
+
+import heapq
+
+import numpy as np
+
+
+class Echeancier:
+    """
+    Tas des échéances des cellules actives, à suppression paresseuse.
+
+    Parameters
+    ----------
+    duree_vie : float, default ``1800``
+        Durée de vie (s) d’une cellule à partir de sa détection.
+
+    Attributes
+    ----------
+    tas : list[tuple[float, int]]
+        Tas binaire des couples ``(echeance, identifiant)``, y compris les
+        entrées périmées.
+    echeances : dict[int, float]
+        Échéance de chaque cellule encore suivie.
+    """
+
+    def __init__(self, duree_vie=1800.0):
+        self.duree_vie = duree_vie
+        self.tas = []
+        self.echeances = {}
+
+    def __len__(self):
+        return len(self.echeances)
+
+    def ajouter(self, identifiants, horodatage):
+        """
+        Programme l’expiration de cellules à ``horodatage + duree_vie``.
+
+        Pour une cellule déjà suivie, la nouvelle échéance remplace
+        l’ancienne (prolongation après un nouveau signalement).
+
+        :param identifiants: Identifiants des cellules.
+        :type identifiants: numpy.ndarray
+        :param horodatage: Instant de détection (secondes epoch).
+        :type horodatage: float
+        """
+        echeance = horodatage + self.duree_vie
+        for ident in np.asarray(identifiants).tolist():
+            self.echeances[ident] = echeance
+            heapq.heappush(self.tas, (echeance, ident))
+
+    def echeances_de(self, identifiants):
+        """
+        Échéances de cellules suivies (``NaN`` pour une cellule inconnue).
+
+        :rtype: numpy.ndarray
+        """
+        return np.array([self.echeances.get(ident, np.nan)
+                         for ident in np.asarray(identifiants).tolist()], dtype=float)
+
+    def retirer(self, identifiants):
+        """Oublie des cellules retirées avant leur échéance (suppression paresseuse)."""
+        for ident in np.asarray(identifiants).tolist():
+            self.echeances.pop(ident, None)
+        # Reconstruction lorsque les entrées périmées dominent le tas
+        if len(self.tas) > 2 * len(self.echeances) + 64:
+            self.tas = [(e, i) for i, e in self.echeances.items()]
+            heapq.heapify(self.tas)
+
+    def expirer(self, maintenant):
+        """
+        Dépile les cellules arrivées à échéance, en *O(k log n)*.
+
+        :param maintenant: Instant courant (secondes epoch).
+        :type maintenant: float
+        :return: Identifiants ``int64`` des cellules expirées.
+        :rtype: numpy.ndarray
+        """
+        expirees = []
+        while self.tas and self.tas[0][0] <= maintenant:
+            echeance, ident = heapq.heappop(self.tas)
+            if self.echeances.get(ident) == echeance:
+                del self.echeances[ident]
+                expirees.append(ident)
+        return np.array(expirees, dtype=np.int64)
+
+    def prochaine(self):
+        """Prochaine échéance suivie, ou ``None``."""
+        while self.tas and self.echeances.get(self.tas[0][1]) != self.tas[0][0]:
+            heapq.heappop(self.tas)
+        return self.tas[0][0] if self.tas else None
@@ -0,0 +1,248 @@
+"""
+fusion.py ― Fusion des détections simultanées
+=============================================
+
+Module de traitement du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Sur les routes chargées, plusieurs avions traversent la même zone
+turbulente à quelques instants d’intervalle. :func:`fusionner_evenements`
+regroupe les événements proches en temps, en distance et en altitude et
+produit **une seule cellule par groupe** :
+
+1. **Voisinage** – hachage des positions sur une grille cartésienne 3D
+   (points sur la sphère, cases de ``rayon_km`` de côté) : seuls les
+   événements de cases adjacentes sont comparés.
+2. **Groupes** – composantes connexes du graphe de voisinage, obtenues par
+   propagation vectorisée de l’étiquette minimale.
+3. **Cellule** – centre pondéré par l’intensité, étendue englobant tous les
+   événements du groupe et confiance combinant les signalements.
+
+Les avions suivants, quelques ticks ou minutes plus tard, renforcent la
+cellule déjà active au lieu d’en créer une nouvelle
+(:func:`renforcer_cellules`, appelée par :class:`main.Main`).
+"""
+
+
+import itertools
+
+import numpy as np
+
+from geodesie import RAYON_TERRE_KM, haversine_km
+
+
+# Décalages vers les 27 cases voisines (case courante comprise)
+VOISINS = np.array(list(itertools.product((-1, 0, 1), repeat=3)))
+
+# Critères de voisinage par défaut : distance, écart d'altitude et écart temporel
+RAYON_KM = 30.0
+ECART_ALT_M = 600.0
+ECART_T_S = 300.0
+
+# Confiance maximale prise en compte (une confiance de 100 % aurait un poids infini)
+CONFIANCE_MAX = 99.9
+
+
+def _cartesien_km(lat, lon):
+    """Coordonnées cartésiennes (km) de points de la sphère terrestre."""
+    phi, lam = np.radians(lat), np.radians(lon)
+    return RAYON_TERRE_KM * np.column_stack(
+        (np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)))
+
+
+def paires_voisines(centres, temps, rayon_km, ecart_alt_m, ecart_t_s):
+    """
+    Liste les couples d’événements à fusionner.
+
+    Deux événements sont voisins si leur distance horizontale est au plus
+    ``rayon_km``, leur écart d’altitude au plus ``ecart_alt_m`` et leur
+    écart temporel au plus ``ecart_t_s``.
+
+    :return: Deux tableaux d’indices ``(i, j)`` avec ``i < j``.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    # La corde est plus courte que l'arc : un voisin à moins de rayon_km
+    # se trouve forcément dans l'une des 27 cases adjacentes.
+    cases = np.floor(_cartesien_km(centres[:, 0], centres[:, 1]) / rayon_km).astype(np.int64)
+    decalage = cases.min(axis=0) - 1
+    dims = cases.max(axis=0) - decalage + 2
+    cles = np.ravel_multi_index((cases - decalage).T, dims)
+
+    ordre = np.argsort(cles, kind="stable")
+    cles_triees = cles[ordre]
+
+    paires_i, paires_j = [], []
+    for delta in VOISINS:
+        cles_voisines = np.ravel_multi_index((cases - decalage + delta).T, dims)
+        debuts = np.searchsorted(cles_triees, cles_voisines, "left")
+        fins = np.searchsorted(cles_triees, cles_voisines, "right")
+        nombres = fins - debuts
+        i = np.repeat(np.arange(len(centres)), nombres)
+        decalages = np.arange(nombres.sum()) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+        paires_i.append(i)
+        paires_j.append(ordre[np.repeat(debuts, nombres) + decalages])
+
+    i, j = np.concatenate(paires_i), np.concatenate(paires_j)
+    garder = i < j
+    i, j = i[garder], j[garder]
+
+    proches = ((haversine_km(centres[i, 0], centres[i, 1], centres[j, 0], centres[j, 1]) <= rayon_km)
+               & (np.abs(centres[i, 2] - centres[j, 2]) <= ecart_alt_m)
+               & (np.abs(temps[i] - temps[j]) <= ecart_t_s))
+    return i[proches], j[proches]
+
+
+def etiqueter_groupes(n, i, j):
+    """
+    Composantes connexes d’un graphe à ``n`` sommets et arêtes ``(i, j)``.
+
+    :return: Étiquettes consécutives ``0..k-1`` de longueur ``n``.
+    :rtype: numpy.ndarray
+    """
+    etiquettes = np.arange(n)
+    while True:
+        precedentes = etiquettes.copy()
+        np.minimum.at(etiquettes, i, etiquettes[j])
+        np.minimum.at(etiquettes, j, etiquettes[i])
+        etiquettes = etiquettes[etiquettes]          # compression des chemins
+        if np.array_equal(etiquettes, precedentes):
+            return np.unique(etiquettes, return_inverse=True)[1]
+
+
+def _combiner(centres, poids, groupes):
+    """
+    Une cellule par groupe : centre et altitude pondérés par ``poids``,
+    étendue englobante et confiance ``100 * (1 - exp(-Σ poids))``.
+
+    :param poids: Contribution de chaque élément au logarithme de la
+        probabilité d’absence de turbulence (``intensite / intensite_ref``).
+    :rtype: numpy.ndarray
+    """
+    k = groupes.max() + 1
+
+    # Centre pondéré : moyenne des vecteurs 3D (sans souci d'antiméridien)
+    ponderation = np.maximum(poids, 1e-6)
+    somme_poids = np.bincount(groupes, ponderation, k)
+    xyz = _cartesien_km(centres[:, 0], centres[:, 1])
+    moyenne = np.column_stack([np.bincount(groupes, xyz[:, c] * ponderation, k) for c in range(3)])
+    lat = np.degrees(np.arctan2(moyenne[:, 2], np.hypot(moyenne[:, 0], moyenne[:, 1])))
+    lon = np.degrees(np.arctan2(moyenne[:, 1], moyenne[:, 0]))
+    alt = np.bincount(groupes, centres[:, 2] * ponderation, k) / somme_poids
+
+    # Étendue : cercle centré englobant chaque élément et son diamètre
+    portee = haversine_km(lat[groupes], lon[groupes], centres[:, 0], centres[:, 1]) + centres[:, 3] / 2
+    diametre = np.zeros(k)
+    np.maximum.at(diametre, groupes, 2 * portee)
+
+    # Confiance combinée des signalements
+    confiance = 100 * (1 - np.exp(-np.bincount(groupes, poids, k)))
+
+    return np.column_stack((lat, lon, alt, diametre, confiance))
+
+
+def poids_confiance(confiance):
+    """
+    Poids équivalent à une confiance : inverse de la combinaison de :func:`_combiner`.
+
+    Une cellule de confiance ``c`` pèse autant que des signalements
+    d’intensité cumulée ``-intensite_ref * ln(1 - c / 100)``.
+
+    :rtype: numpy.ndarray
+    """
+    return -np.log1p(-np.minimum(np.asarray(confiance, dtype=float), CONFIANCE_MAX) / 100)
+
+
+def fusionner_evenements(centres, intensites, temps, rayon_km=RAYON_KM, ecart_alt_m=ECART_ALT_M,
+                         ecart_t_s=ECART_T_S, intensite_ref=10.0):
+    """
+    Fusionne les événements proches en une cellule par groupe.
+
+    Chaque signalement ``k`` contribue une probabilité
+    ``p_k = 1 - exp(-intensite_k / intensite_ref)`` ; la confiance de la
+    cellule vaut ``100 * (1 - prod(1 - p_k))`` : elle croît avec le nombre
+    d’avions et la force du signal.
+
+    :param centres: Tableau *(N, 5)* ``[lat, lon, alt, diam_km, confiance]``
+        (sortie de :meth:`turbulence.TurbulenceDetector.centre_turbulence`).
+    :type centres: numpy.ndarray
+    :param intensites: Intensité de chaque événement (saut maximal de
+        ``vertical_rate`` en m/s).
+    :type intensites: numpy.ndarray
+    :param temps: Instant de fin de chaque événement (secondes epoch).
+    :type temps: numpy.ndarray
+    :param rayon_km: Distance horizontale maximale entre deux événements fusionnés.
+    :type rayon_km: float
+    :param ecart_alt_m: Écart d’altitude maximal (m).
+    :type ecart_alt_m: float
+    :param ecart_t_s: Écart temporel maximal (s).
+    :type ecart_t_s: float
+    :param intensite_ref: Intensité (m/s) donnant une probabilité de 63 %.
+    :type intensite_ref: float
+    :return: Tableau *(M, 5)* des cellules fusionnées, M ≤ N.
+    :rtype: numpy.ndarray
+    """
+    centres = np.asarray(centres, dtype=float).reshape(-1, 5)
+    n = len(centres)
+    if n == 0:
+        return centres
+
+    groupes = etiqueter_groupes(n, *paires_voisines(
+        centres, np.asarray(temps, dtype=float), rayon_km, ecart_alt_m, ecart_t_s))
+    return _combiner(centres, np.asarray(intensites, dtype=float) / intensite_ref, groupes)
+
+
+def renforcer_cellules(cellules, temps_cellules, nouvelles, temps, rayon_km=RAYON_KM,
+                       ecart_alt_m=ECART_ALT_M, ecart_t_s=ECART_T_S):
+    """
+    Fusionne de nouvelles cellules avec les cellules existantes voisines.
+
+    Les cellules existantes (déjà déplacées par le vent) et les nouvelles
+    sont regroupées avec les mêmes critères que :func:`fusionner_evenements`,
+    l’instant de chaque cellule existante étant celui de son dernier
+    signalement. Chaque groupe contenant au moins une nouvelle cellule
+    produit une cellule, dont la confiance combine celles de ses membres
+    (:func:`poids_confiance`). Les groupes sans nouvelle cellule ne sont pas
+    modifiés.
+
+    :param cellules: Cellules existantes *(N, 5)*.
+    :type cellules: numpy.ndarray
+    :param temps_cellules: Instant du dernier signalement de chaque cellule existante.
+    :type temps_cellules: numpy.ndarray
+    :param nouvelles: Nouvelles cellules *(M, 5)*.
+    :type nouvelles: numpy.ndarray
+    :param temps: Instant de détection de chaque nouvelle cellule.
+    :type temps: numpy.ndarray
+    :return: ``(fusionnees, representants, absorbees)`` :
+
+        * ``fusionnees`` – cellules *(K, 5)* des groupes touchés ;
+        * ``representants`` – pour chacune, l’indice de la cellule existante
+          qu’elle remplace, ou ``-1`` si le groupe ne contient que de
+          nouvelles cellules ;
+        * ``absorbees`` – indices des autres cellules existantes de ces
+          groupes, à retirer.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    cellules = np.asarray(cellules, dtype=float).reshape(-1, 5)
+    nouvelles = np.asarray(nouvelles, dtype=float).reshape(-1, 5)
+    n = len(cellules)
+    if len(nouvelles) == 0:
+        return nouvelles, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    tout = np.vstack((cellules, nouvelles))
+    instants = np.concatenate((np.asarray(temps_cellules, dtype=float),
+                               np.asarray(temps, dtype=float)))
+    groupes = etiqueter_groupes(len(tout), *paires_voisines(
+        tout, instants, rayon_km, ecart_alt_m, ecart_t_s))
+
+    # Groupes touchés : ceux qui contiennent une nouvelle cellule
+    touches = np.unique(groupes[n:])
+    membre = np.isin(groupes, touches)
+    groupes_touches = np.searchsorted(touches, groupes[membre])
+    fusionnees = _combiner(tout[membre], poids_confiance(tout[membre, 4]), groupes_touches)
+
+    # Représentant : plus petit indice de cellule existante du groupe
+    existantes = np.flatnonzero(membre[:n])
+    representants = np.full(len(touches), n, dtype=np.int64)
+    np.minimum.at(representants, np.searchsorted(touches, groupes[existantes]), existantes)
+    absorbees = np.setdiff1d(existantes, representants)
+    representants[representants == n] = -1
+    return fusionnees, representants, absorbees
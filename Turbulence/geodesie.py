@@ -0,0 +1,335 @@
+"""
+geodesie.py ― Noyaux géodésiques et atmosphériques vectorisés
+=============================================================
+
+Module de calcul du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Toutes les fonctions acceptent des scalaires ou des tableaux NumPy
+(diffusion / *broadcasting*) et renvoient des tableaux : elles sont
+destinées à être appelées une fois par lot, jamais dans une boucle.
+
+* distances et caps sur la sphère (:func:`haversine_km`, :func:`cap_deg`,
+  :func:`destination`) ;
+* distances entre ensembles de points (:func:`distances_paires`,
+  :func:`plus_proche_voisin`, :func:`distance_point_segment`) ;
+* emprise en latitude d’un segment orthodromique, sommet compris
+  (:func:`latitudes_extremes`) ;
+* conversion altitude ↔ pression selon l’atmosphère standard ISA
+  (:func:`altitude_vers_hpa`, :func:`hpa_vers_altitude`) ;
+* conversions d’unités : altitude ↔ niveau de vol
+  (:func:`metres_vers_niveau_de_vol`, :func:`niveau_de_vol_vers_metres`) et
+  longueur d’un degré de méridien (:data:`KM_PAR_DEGRE`).
+
+Les exemples des docstrings servent de tests de référence ::
+
+    python -m doctest geodesie.py
+"""
+
+
+import numpy as np
+
+
+RAYON_TERRE_KM = 6371.0
+KM_PAR_DEGRE = float(np.radians(RAYON_TERRE_KM))     # longueur d'un degré de méridien
+PIEDS_PAR_METRE = 3.28084
+
+# Atmosphère standard ISA (troposphère puis tropopause isotherme)
+P0_HPA = 1013.25
+T0_K = 288.15
+GRADIENT_K_M = 0.0065
+EXPOSANT_ISA = 5.255877
+ALTITUDE_TROPOPAUSE_M = 11000.0
+P_TROPOPAUSE_HPA = P0_HPA * (1 - GRADIENT_K_M * ALTITUDE_TROPOPAUSE_M / T0_K) ** EXPOSANT_ISA
+ECHELLE_STRATOSPHERE_M = 6341.62
+
+
+def distance_angulaire(lat1, lon1, lat2, lon2):
+    """
+    Distance angulaire (rad) entre deux points exprimés en radians (haversine).
+
+    :rtype: numpy.ndarray
+    """
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def cap(lat1, lon1, lat2, lon2):
+    """
+    Cap initial (rad) du premier point vers le second, en radians.
+
+    :rtype: numpy.ndarray
+    """
+    dlon = lon2 - lon1
+    return np.arctan2(np.sin(dlon) * np.cos(lat2),
+                      np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distance orthodromique (km) entre points donnés en degrés.
+
+    :param lat1: Latitude(s) du ou des premiers points.
+    :param lon1: Longitude(s) du ou des premiers points.
+    :param lat2: Latitude(s) du ou des seconds points.
+    :param lon2: Longitude(s) du ou des seconds points.
+    :return: Distances en kilomètres (forme diffusée des entrées).
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> round(float(haversine_km(48.8566, 2.3522, 51.5074, -0.1278)), 1)   # Paris → Londres
+    343.6
+    >>> round(float(haversine_km(0, 0, 1, 0)), 2)                          # 1° de méridien
+    111.19
+    >>> haversine_km([0, 0], [0, 0], [0, 0], [90, 180]).round(1).tolist()
+    [10007.5, 20015.1]
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float))
+                              for v in (lat1, lon1, lat2, lon2))
+    return distance_angulaire(lat1, lon1, lat2, lon2) * RAYON_TERRE_KM
+
+
+def cap_deg(lat1, lon1, lat2, lon2):
+    """
+    Cap initial (degrés, 0 = nord, sens horaire) entre points en degrés.
+
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> cap_deg(0, 0, [1, 0, -1], [0, 1, 0]).round(6).tolist()
+    [0.0, 90.0, 180.0]
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float))
+                              for v in (lat1, lon1, lat2, lon2))
+    return np.degrees(cap(lat1, lon1, lat2, lon2)) % 360
+
+
+def destination(lat, lon, cap_degres, distance_km):
+    """
+    Point atteint en partant de ``(lat, lon)`` selon un cap et une distance.
+
+    :param lat: Latitude(s) de départ (degrés).
+    :param lon: Longitude(s) de départ (degrés).
+    :param cap_degres: Cap(s) en degrés (0 = nord, sens horaire).
+    :param distance_km: Distance(s) parcourue(s) en kilomètres.
+    :return: ``(lat, lon)`` d’arrivée en degrés, longitude dans ``[-180, 180[``.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+
+    Examples
+    --------
+    >>> lat, lon = destination(0, 0, 90, 111.19492664)
+    >>> round(float(lat), 6), round(float(lon), 6)
+    (0.0, 1.0)
+    >>> lat, lon = destination(45, 179.5, 90, 100)
+    >>> round(float(lat), 3), round(float(lon), 3)
+    (44.993, -179.228)
+    """
+    phi1 = np.radians(np.asarray(lat, dtype=float))
+    lambda1 = np.radians(np.asarray(lon, dtype=float))
+    theta = np.radians(np.asarray(cap_degres, dtype=float))
+    delta = np.asarray(distance_km, dtype=float) / RAYON_TERRE_KM
+
+    phi2 = np.arcsin(np.clip(np.sin(phi1) * np.cos(delta)
+                             + np.cos(phi1) * np.sin(delta) * np.cos(theta), -1, 1))
+    lambda2 = lambda1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi1),
+                                   np.cos(delta) - np.sin(phi1) * np.sin(phi2))
+    return np.degrees(phi2), (np.degrees(lambda2) + 180) % 360 - 180
+
+
+def distances_paires(lat1, lon1, lat2, lon2):
+    """
+    Matrice des distances (km) entre deux ensembles de points en degrés.
+
+    :param lat1: Latitudes *(N,)* du premier ensemble.
+    :param lon1: Longitudes *(N,)* du premier ensemble.
+    :param lat2: Latitudes *(M,)* du second ensemble.
+    :param lon2: Longitudes *(M,)* du second ensemble.
+    :return: Matrice *(N, M)*.
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> distances_paires([0, 0], [0, 1], [0], [0]).round(2).tolist()
+    [[0.0], [111.19]]
+    """
+    return haversine_km(np.asarray(lat1, dtype=float)[:, None],
+                        np.asarray(lon1, dtype=float)[:, None],
+                        np.asarray(lat2, dtype=float)[None, :],
+                        np.asarray(lon2, dtype=float)[None, :])
+
+
+def plus_proche_voisin(lat, lon, lat_ref, lon_ref, taille_bloc=2048):
+    """
+    Pour chaque point, indice et distance (km) du point de référence le plus proche.
+
+    Le calcul est fait par blocs de ``taille_bloc`` points pour borner la
+    mémoire de la matrice de distances.
+
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+
+    Examples
+    --------
+    >>> indices, distances = plus_proche_voisin([0, 10], [0.5, 10], [0, 0, 10], [0, 1, 9])
+    >>> indices.tolist(), distances.round(2).tolist()
+    ([0, 2], [55.6, 109.51])
+    """
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    indices = np.empty(len(lat), dtype=np.int64)
+    distances = np.empty(len(lat))
+    for debut in range(0, len(lat), taille_bloc):
+        bloc = slice(debut, debut + taille_bloc)
+        matrice = distances_paires(lat[bloc], lon[bloc], lat_ref, lon_ref)
+        indices[bloc] = matrice.argmin(axis=1)
+        distances[bloc] = matrice[np.arange(len(matrice)), indices[bloc]]
+    return indices, distances
+
+
+def distance_point_segment(lat, lon, lat_a, lon_a, lat_b, lon_b):
+    """
+    Distance (km) de points à des segments orthodromiques ``A → B``.
+
+    Utilise l’écart latéral (*cross-track*) lorsque la projection du point
+    tombe sur le segment, la distance à l’extrémité la plus proche sinon.
+
+    :return: ``(distance_km, abscisse_km, longueur_km)`` : distance au
+        segment, position de la projection depuis ``A`` (bornée au segment)
+        et longueur du segment, sous la forme diffusée des entrées.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+
+    Examples
+    --------
+    >>> d, x, l = distance_point_segment([1, 0, 0], [0.5, -1, 3], 0, 0, 0, 2)
+    >>> d.round(2).tolist(), x.round(2).tolist(), l.round(2).tolist()
+    ([111.19, 111.19, 111.19], [55.6, 0.0, 222.39], [222.39, 222.39, 222.39])
+    """
+    lat_p, lon_p, lat_a, lon_a, lat_b, lon_b = (
+        np.radians(np.asarray(v, dtype=float)) for v in (lat, lon, lat_a, lon_a, lat_b, lon_b))
+
+    d12 = distance_angulaire(lat_a, lon_a, lat_b, lon_b)
+    d13 = distance_angulaire(lat_a, lon_a, lat_p, lon_p)
+    d23 = distance_angulaire(lat_b, lon_b, lat_p, lon_p)
+    ecart_cap = cap(lat_a, lon_a, lat_p, lon_p) - cap(lat_a, lon_a, lat_b, lon_b)
+
+    xt = np.arcsin(np.clip(np.sin(d13) * np.sin(ecart_cap), -1, 1))
+    at = np.sign(np.cos(ecart_cap)) * np.arccos(
+        np.clip(np.cos(d13) / np.maximum(np.cos(xt), 1e-12), -1, 1))
+    distance = np.where(at < 0, d13, np.where(at > d12, d23, np.abs(xt)))
+    return (distance * RAYON_TERRE_KM, np.clip(at, 0, d12) * RAYON_TERRE_KM,
+            np.broadcast_to(d12, distance.shape) * RAYON_TERRE_KM)
+
+
+def latitudes_extremes(lat_a, lon_a, lat_b, lon_b):
+    """
+    Latitudes minimale et maximale (degrés) atteintes par des segments
+    orthodromiques ``A → B``.
+
+    Un grand cercle s’écarte de l’équateur entre ses extrémités : son
+    sommet (point de latitude extrême) est retenu lorsqu’il appartient au
+    segment, ce que les seules extrémités ne montrent pas.
+
+    :return: ``(lat_min, lat_max)`` sous la forme diffusée des entrées.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+
+    Examples
+    --------
+    >>> bas, haut = latitudes_extremes([50, 0, -30], [-60, 0, 10], [50, 0, -30], [0, 90, 50])
+    >>> bas.round(2).tolist(), haut.round(2).tolist()
+    ([50.0, 0.0, -31.57], [53.99, 0.0, -30.0])
+    """
+    lat_a, lon_a, lat_b, lon_b = (
+        np.radians(np.asarray(v, dtype=float)) for v in (lat_a, lon_a, lat_b, lon_b))
+    a = np.stack(np.broadcast_arrays(np.cos(lat_a) * np.cos(lon_a),
+                                     np.cos(lat_a) * np.sin(lon_a), np.sin(lat_a)), axis=-1)
+    b = np.stack(np.broadcast_arrays(np.cos(lat_b) * np.cos(lon_b),
+                                     np.cos(lat_b) * np.sin(lon_b), np.sin(lat_b)), axis=-1)
+    a, b = np.broadcast_arrays(a, b)
+
+    # Sommet nord : projection du pôle sur le plan du grand cercle (normale n)
+    n = np.cross(a, b)
+    norme = np.linalg.norm(n, axis=-1, keepdims=True)
+    n = np.divide(n, norme, out=np.zeros_like(n), where=norme > 1e-12)
+    sommet = np.array([0.0, 0.0, 1.0]) - n[..., 2:3] * n
+    norme_sommet = np.linalg.norm(sommet, axis=-1, keepdims=True)
+    sommet = np.divide(sommet, norme_sommet, out=np.zeros_like(sommet), where=norme_sommet > 1e-12)
+    lat_sommet = np.arcsin(np.clip(sommet[..., 2], -1, 1))
+
+    def sur_segment(p):
+        """Le point ``p`` du grand cercle est-il entre ``A`` et ``B`` ?"""
+        return ((np.einsum("...i,...i", np.cross(a, p), n) >= 0)
+                & (np.einsum("...i,...i", np.cross(p, b), n) >= 0)
+                & (norme[..., 0] > 1e-12))
+
+    bas = np.minimum(lat_a, lat_b)
+    haut = np.maximum(lat_a, lat_b)
+    haut = np.where(sur_segment(sommet), np.maximum(haut, lat_sommet), haut)
+    bas = np.where(sur_segment(-sommet), np.minimum(bas, -lat_sommet), bas)
+    return np.degrees(bas) + 0.0, np.degrees(haut) + 0.0
+
+
+def metres_vers_niveau_de_vol(altitude_m):
+    """
+    Niveau de vol (centaines de pieds) correspondant à une altitude (m).
+
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> metres_vers_niveau_de_vol([0, 3048, 10668]).round(1).tolist()
+    [0.0, 100.0, 350.0]
+    """
+    return np.asarray(altitude_m, dtype=float) * PIEDS_PAR_METRE / 100
+
+
+def niveau_de_vol_vers_metres(niveau_de_vol):
+    """
+    Altitude (m) d’un niveau de vol (centaines de pieds), inverse de
+    :func:`metres_vers_niveau_de_vol`.
+
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> niveau_de_vol_vers_metres([100, 350]).round(0).tolist()
+    [3048.0, 10668.0]
+    """
+    return np.asarray(niveau_de_vol, dtype=float) * 100 / PIEDS_PAR_METRE
+
+
+def altitude_vers_hpa(altitude_m):
+    """
+    Pression standard ISA (hPa) correspondant à une altitude (m).
+
+    Troposphère à gradient constant jusqu’à 11 km, puis couche isotherme.
+
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> altitude_vers_hpa([0, 5000, 11000, 15000]).round(1).tolist()
+    [1013.2, 540.2, 226.3, 120.4]
+    """
+    z = np.asarray(altitude_m, dtype=float)
+    troposphere = P0_HPA * np.clip(1 - GRADIENT_K_M * np.minimum(z, ALTITUDE_TROPOPAUSE_M) / T0_K,
+                                   0, None) ** EXPOSANT_ISA
+    stratosphere = P_TROPOPAUSE_HPA * np.exp(-(z - ALTITUDE_TROPOPAUSE_M) / ECHELLE_STRATOSPHERE_M)
+    return np.where(z <= ALTITUDE_TROPOPAUSE_M, troposphere, stratosphere)
+
+
+def hpa_vers_altitude(pression_hpa):
+    """
+    Altitude ISA (m) correspondant à une pression (hPa), inverse de
+    :func:`altitude_vers_hpa`.
+
+    :rtype: numpy.ndarray
+
+    Examples
+    --------
+    >>> hpa_vers_altitude([1013.25, 500, 250, 200]).round(0).tolist()
+    [0.0, 5574.0, 10363.0, 11784.0]
+    """
+    p = np.asarray(pression_hpa, dtype=float)
+    troposphere = T0_K / GRADIENT_K_M * (1 - (p / P0_HPA) ** (1 / EXPOSANT_ISA))
+    stratosphere = ALTITUDE_TROPOPAUSE_M - ECHELLE_STRATOSPHERE_M * np.log(p / P_TROPOPAUSE_HPA)
+    return np.where(p >= P_TROPOPAUSE_HPA, troposphere, stratosphere)
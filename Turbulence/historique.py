@@ -0,0 +1,95 @@
+"""
+historique.py ― Mémoire des dernières publications
+==================================================
+
+Module utilitaire du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+:class:`HistoriqueInstantanes` conserve en mémoire les derniers états
+publiés par :class:`main.Main`, afin que le tableau de bord puisse les
+rejouer (curseur temporel) sans recalcul ni nouvel appel aux API.
+
+Chaque instantané est stocké en ``float32`` ; le nombre d’instantanés et
+la mémoire totale sont bornés, les plus anciens étant évincés en premier.
+"""
+
+
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class HistoriqueInstantanes:
+    """
+    Anneau borné des derniers instantanés publiés.
+
+    Parameters
+    ----------
+    capacite : int, default ``400``
+        Nombre maximal d’instantanés conservés (≈ 20 min à une publication
+        toutes les 3 s).
+    budget_octets : int, default ``64 * 2**20``
+        Mémoire maximale occupée par les tableaux de cellules.
+
+    Attributes
+    ----------
+    instantanes : collections.deque
+        Triplets ``(generation, horodatage, cellules)`` du plus ancien au
+        plus récent ; ``cellules`` est un tableau ``float32`` *(N, 5)*.
+    octets : int
+        Mémoire actuellement occupée par les cellules conservées.
+    """
+
+    def __init__(self, capacite=400, budget_octets=64 * 2**20):
+        self.capacite = capacite
+        self.budget_octets = budget_octets
+        self.instantanes = deque()
+        self.octets = 0
+        self.lock = threading.Lock()
+
+    def ajouter(self, generation, horodatage, cellules):
+        """
+        Enregistre un instantané, en évinçant les plus anciens si nécessaire.
+
+        :param generation: Génération publiée.
+        :type generation: int
+        :param horodatage: Instant de publication (secondes epoch).
+        :type horodatage: float
+        :param cellules: Tableau *(N, 5)* des cellules publiées.
+        :type cellules: numpy.ndarray
+        """
+        compact = np.array(cellules, dtype=np.float32).reshape(-1, 5)
+        if compact.nbytes > self.budget_octets:
+            return
+
+        with self.lock:
+            self.instantanes.append((generation, horodatage, compact))
+            self.octets += compact.nbytes
+            while (len(self.instantanes) > self.capacite
+                   or self.octets > self.budget_octets):
+                self.octets -= self.instantanes.popleft()[2].nbytes
+
+    def index(self):
+        """
+        Liste les instantanés disponibles.
+
+        :return: Couples ``(generation, horodatage)`` du plus ancien au plus récent.
+        :rtype: list[tuple[int, float]]
+        """
+        with self.lock:
+            return [(gen, temps) for gen, temps, _ in self.instantanes]
+
+    def instantane(self, generation):
+        """
+        Renvoie l’instantané d’une génération donnée.
+
+        :param generation: Génération recherchée.
+        :type generation: int
+        :return: ``(horodatage, cellules)`` ou ``None`` si la génération a été évincée.
+        :rtype: tuple[float, numpy.ndarray] | None
+        """
+        with self.lock:
+            for gen, temps, cellules in self.instantanes:
+                if gen == generation:
+                    return temps, cellules
+        return None
@@ -11,8 +11,19 @@ Boucle de suivi et de prévision des turbulences pour le projet
 4. **Fait dériver** chaque cellule turbulente selon le vent (advection).
 5. **Publie** un tableau NumPy thread-safe ``self.to_display`` consommé par
    l’interface Streamlit.
+
+Le cycle de vie du collecteur est explicite : :meth:`Main.start` lance le
+thread de collecte, :meth:`Main.stop` l’interrompt proprement.
+
+Exécuté directement, le module lance un collecteur *headless* qui publie
+ses résultats en mémoire partagée (cf. :mod:`memoire_partagee`) et/ou via
+un serveur HTTP local (cf. :mod:`serveur_http`) ::
+
+    python main.py --memoire-partagee turbulences --port-http 8502
 """
 
+import argparse
+import logging
 import threading
 import time
 
@@ -21,7 +32,19 @@ import numpy as np
 from requetes_opensky import OpenSky
 from turbulence import TurbulenceDetector
 from requetes_meteo import OpenMeteo
-from modele_deplacement_turbulence import deplacement_turbulence
+from modele_deplacement_turbulence import deplacement_turbulence, masque_conservation
+from memoire_partagee import TamponPartage
+from serveur_http import ServeurCellules
+from historique import HistoriqueInstantanes
+from stockage import MagasinEvenements, TYPE_ADVECTION, TYPE_EVENEMENT
+from climatologie import RasterDensite
+from couloir import IndexCellules
+from bandes import bandes_occupees, debuts_bandes, masque_zone, tranche, trier_par_bande
+from echeancier import Echeancier
+from fusion import ECART_T_S, renforcer_cellules
+
+
+journal = logging.getLogger(__name__)
 
 
 class Main:
@@ -33,6 +56,36 @@ class Main:
     bbox : tuple[float, float, float, float] | None, optional
         *(min_lon, max_lon, min_lat, max_lat)*.
         ``None`` ⇒ requête monde entier (⚠︎ volumineux).
+    periode : float, default ``3``
+        Durée (s) de chaque pause entre deux demi-cycles.
+    tampon : memoire_partagee.TamponPartage | None, optional
+        Segment partagé dans lequel chaque publication est recopiée
+        (mode collecteur hors processus).
+    capacite_historique : int, default ``400``
+        Nombre d’instantanés publiés conservés pour la relecture.
+    stockage : stockage.MagasinEvenements | None, optional
+        Magasin sur disque recevant les turbulences confirmées et les
+        cellules déplacées conservées dans l’état actif (une fois par
+        advection cumulée, pas à chaque republication).
+    climatologie : climatologie.RasterDensite | None, optional
+        Histogramme de densité alimenté par chaque lot de turbulences
+        confirmées.
+    url_opensky, url_token : str | None, optional
+        URL des états et de l’authentification OpenSky (API publique par
+        défaut, cf. :class:`requetes_opensky.OpenSky`).
+    url_meteo : str | None, optional
+        URL de l’API de prévision (Open-Meteo par défaut).
+    duree_vie : float, default ``1800``
+        Durée de vie (s, heure murale) d’une cellule après sa détection.
+    demi_vie : float, default ``600``
+        Demi-vie (s) de la confiance des nouvelles cellules.
+    capacite_max : int, default ``20000``
+        Nombre maximal de cellules actives ; au-delà, les moins sûres sont
+        évincées.
+    fusion : bool, default ``True``
+        Fusionne les détections d’un même tick (:mod:`fusion`) et renforce
+        les cellules actives signalées depuis moins de
+        :data:`fusion.ECART_T_S` au lieu de créer une cellule par avion.
 
     Attributs
     ---------
@@ -41,57 +94,213 @@ class Main:
     detector : TurbulenceDetector
         Fenêtre glissante de 5 ticks pour la détection.
     turbulences_actives : numpy.ndarray
-        Tableau *(N, 5)* `[lon, lat, alt, diam, timestamp]`.
+        Tableau *(N, 5)* `[lat, lon, alt, diam, confiance]`, trié par bande
+        d’altitude (cf. :mod:`bandes`).
+    identifiants : numpy.ndarray
+        Identifiants ``int64`` stables des lignes de ``turbulences_actives``.
+    debuts_bandes : numpy.ndarray
+        Débuts de bande dans ``turbulences_actives`` (la bande ``k`` occupe
+        ``debuts_bandes[k]:debuts_bandes[k + 1]``).
+    demi_vies : numpy.ndarray
+        Demi-vie (s) de la confiance de chaque ligne de ``turbulences_actives``.
+    echeancier : echeancier.Echeancier
+        Tas des échéances des cellules actives.
     to_display : numpy.ndarray
         Copie protégée de ``turbulences_actives`` destinée au front-end.
+    ids_display : numpy.ndarray
+        Identifiants des lignes de ``to_display``.
+    debuts_display : numpy.ndarray
+        Débuts de bande dans ``to_display``.
+    generation : int
+        Numéro incrémenté à chaque publication de ``to_display``.
+    historique : historique.HistoriqueInstantanes
+        Derniers instantanés publiés, rejouables par le tableau de bord.
     lock : threading.Lock
         Verrou garantissant l’accès thread-safe à ``to_display``.
+    publication : threading.Condition
+        Condition (adossée à ``lock``) notifiée à chaque publication.
+    echecs : int
+        Nombre de demi-cycles en échec depuis le lancement (API
+        indisponible, réponse invalide…).
     """
 
-    def __init__(self, bbox = None):
+    def __init__(self, bbox = None, periode=3, tampon=None, capacite_historique=400,
+                 stockage=None, climatologie=None, url_opensky=None, url_token=None,
+                 url_meteo=None, duree_vie=1800, demi_vie=600, capacite_max=20_000,
+                 fusion=True):
         # Zone d'intéret
         self.bbox = bbox
-
-        self.detector = TurbulenceDetector(window_size=5)
-
-        # Colonnes : lon, lat, alt, diamètre, timestamp
+        self.periode = periode
+        self.tampon = tampon
+        self.stockage = stockage
+        self.climatologie = climatologie
+        self.url_meteo = url_meteo
+        self.demi_vie = demi_vie
+        self.capacite_max = capacite_max
+        self.fusion = fusion
+
+        self.opensky = OpenSky(url_json=url_opensky, url_token=url_token)
+        self.detector = TurbulenceDetector(window_size=5, fusion=fusion)
+
+        # Colonnes : lat, lon, alt, diamètre, confiance
         self.turbulences_actives: np.ndarray = np.empty((0, 5), dtype=float)
+        self.identifiants: np.ndarray = np.empty(0, dtype=np.int64)
+        self.debuts_bandes: np.ndarray = debuts_bandes(self.turbulences_actives)
+        self.demi_vies: np.ndarray = np.empty(0, dtype=float)
+        self.echeancier = Echeancier(duree_vie)
+        self._instant_advection = time.time()   # dernière advection conservée
+        self._prochain_id = 0
 
         self.to_display: np.ndarray = np.empty((0, 5), dtype=float)
+        self.ids_display: np.ndarray = np.empty(0, dtype=np.int64)
+        self.debuts_display: np.ndarray = self.debuts_bandes.copy()
+        self.generation = 0
+        self.historique = HistoriqueInstantanes(capacite_historique)
+        self._index_couloir = (None, None)      # (génération, IndexCellules)
 
         # Verrou pour accès thread-safe à ``to_display``
         self.lock = threading.Lock()
+        self.publication = threading.Condition(self.lock)
 
-        # Démarrage de la boucle en tâche de fond
-        threading.Thread(target=self.loop, daemon=True).start()
+        # Thread de collecte et signal d'arrêt (cf. ``start`` / ``stop``)
+        self._thread = None
+        self._arret = threading.Event()
+        self.echecs = 0
+
+    @property
+    def en_cours(self):
+        """``True`` si le thread de collecte est actif."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Lance la boucle de collecte dans un thread *daemon*.
+
+        L’appel est idempotent : si le collecteur tourne déjà, rien n’est fait.
+
+        :return: L’instance elle-même, pour permettre ``Main().start()``.
+        :rtype: Main
+        """
+        if self.en_cours:
+            return self
+        self._arret.clear()
+        self._thread = threading.Thread(target=self.loop, daemon=True,
+                                        name="collecteur-turbulences")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Demande l’arrêt de la boucle et attend la fin du thread.
+
+        La boucle vérifie le signal d’arrêt à chaque pause : l’arrêt est donc
+        effectif au plus tard à la fin de la requête HTTP en cours.
+
+        :param timeout: Temps d’attente maximal (s) ; ``None`` = sans limite.
+        :type timeout: float, optional
+        """
+        self._arret.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def publier(self, cellules, identifiants):
+        """
+        Publie atomiquement un nouvel état des cellules.
+
+        Met à jour ``to_display``, ``ids_display``, ``debuts_display`` et ``generation`` sous
+        verrou, réveille les abonnés de ``publication``, archive l’état dans
+        ``historique`` puis le recopie dans le tampon partagé s’il y en a un.
+
+        :param cellules: Tableau *(N, 5)* des cellules à afficher, trié par bande.
+        :type cellules: numpy.ndarray
+        :param identifiants: Identifiants des N cellules.
+        :type identifiants: numpy.ndarray
+        """
+        debuts = debuts_bandes(cellules)
+        with self.publication:
+            self.to_display = cellules.copy()
+            self.ids_display = identifiants.copy()
+            self.debuts_display = debuts
+            self.generation += 1
+            generation = self.generation
+            self.publication.notify_all()
+
+        self.historique.ajouter(generation, time.time(), cellules)
+
+        if self.tampon is not None:
+            self.tampon.ecrire(cellules, generation)
+
+    def index_couloir(self):
+        """
+        Renvoie l’index spatial des cellules publiées, reconstruit au besoin.
+
+        L’index n’est recalculé qu’une fois par génération ; toutes les
+        requêtes de route d’une même génération le partagent.
+
+        :return: ``(cellules, index)`` pour la génération courante.
+        :rtype: tuple[numpy.ndarray, couloir.IndexCellules]
+        """
+        with self.lock:
+            generation, cellules = self.generation, self.to_display
+            if self._index_couloir[0] != generation:
+                self._index_couloir = (generation, IndexCellules(cellules))
+            return cellules, self._index_couloir[1]
+
+    def cellules_sur_route(self, waypoints, rayon_km=50.0, tolerance_fl=20):
+        """
+        Liste les cellules actives proches d’un plan de vol.
+
+        :param waypoints: Tableau *(M, 3)* ``[lat, lon, niveau_de_vol]``.
+        :type waypoints: numpy.ndarray
+        :param rayon_km: Demi-largeur du couloir (km).
+        :type rayon_km: float
+        :param tolerance_fl: Écart de niveau de vol admis (centaines de pieds).
+        :type tolerance_fl: float
+        :return: Tableau *(K, 7)* ``[lat, lon, alt, diam, confiance,
+            distance_laterale_km, distance_parcours_km]`` trié le long de la route.
+        :rtype: numpy.ndarray
+
+        See Also
+        --------
+        :meth:`couloir.IndexCellules.route`
+        """
+        cellules, index = self.index_couloir()
+        indices, laterale, parcours = index.route(waypoints, rayon_km, tolerance_fl)
+        return np.column_stack((cellules[indices], laterale, parcours))
 
     def loop(self):
         """
         Boucle principale exécutée en arrière-plan.
 
-        Cette méthode tourne indéfiniment dans un thread *daemon* et enchaîne
+        Cette méthode tourne dans un thread *daemon* jusqu’à l’appel de
+        :meth:`stop` et enchaîne
         périodiquement les opérations suivantes :
 
         1. **Acquisition ADS-B** – interroge l’API *OpenSky* pour obtenir
            l’état instantané des aéronefs dans la *bounding box* ``self.bbox``.
         2. **Détection de turbulences** – transmet les nouveaux états
            au :class:`turbulence.TurbulenceDetector` qui renvoie les cellules
-           turbulentes fraîchement identifiées.
+           turbulentes fraîchement identifiées, puis lance en arrière-plan
+           le préchauffage des vents autour des avions encore instables
+           (:meth:`requetes_meteo.OpenMeteo.prechauffer`).
         3. **Mise à jour des cellules existantes** – récupère la météo locale
            via :class:`requetes_meteo.OpenMeteo` puis fait dériver chacune des
            cellules déjà actives selon le vent
            (:func:`modele_deplacement_turbulence.deplacement_turbulence`).
-        4. **Fusion** – empile les turbulences déplacées et les nouvelles pour
-           obtenir l’état global ``self.turbulences_actives``.
+        4. **Fusion** – renforce les cellules déplacées signalées récemment
+           par les nouvelles turbulences voisines (:meth:`_renforcer`), puis
+           empile les autres pour obtenir l’état global
+           ``self.turbulences_actives``.
         5. **Publication thread-safe** – copie atomiquement cet état dans
-           ``self.to_display`` afin que l’interface Streamlit puisse l’afficher
-           sans risque de condition de course.
-        6. **Temporisation** – attend 3 s avant de reprendre le cycle.
+           ``self.to_display`` (:meth:`publier`) afin que l’interface
+           Streamlit puisse l’afficher sans risque de condition de course.
+        6. **Temporisation** – attend ``self.periode`` s avant de reprendre le
+           cycle, en restant réactive au signal d’arrêt.
 
         Les cellules turbulentes sont stockées dans des tableaux NumPy
         de forme *(N, 5)* avec les colonnes ::
 
-            [longitude, latitude, altitude, diametre, timestamp]
+            [latitude, longitude, altitude_m, diametre_km, confiance]
 
         Parameters
         ----------
@@ -100,16 +309,22 @@ class Main:
         Returns
         -------
         None
-            La fonction est bloquante : elle ne renvoie jamais de valeur et ne
-            se termine qu’à l’arrêt du programme.
+            La fonction est bloquante : elle ne se termine qu’après un appel
+            à :meth:`stop`.
 
         Notes
         -----
         - **Cadence effective** ≈ 6 s : ~3 s de traitement + 3 s de pause.
         - L’accès au tableau publié (`self.to_display`) est protégé par
           un :class:`threading.Lock` (``self.lock``).
-        - Les données météo et ADS-B sont externes ; prévois une gestion
-          d’exception si l’une des API devient indisponible.
+        - Chaque demi-cycle commence par retirer les cellules arrivées à
+          échéance (:class:`echeancier.Echeancier`), avant toute requête
+          météo ; le nombre de cellules actives est borné par
+          ``capacite_max``.
+        - Les données météo et ADS-B sont externes : un demi-cycle en échec
+          (délai dépassé, code 503, réponse incomplète…) est journalisé et
+          compté dans ``echecs``, puis la boucle reprend au demi-cycle
+          suivant ; le thread ne s’arrête que sur :meth:`stop`.
 
         See Also
         --------
@@ -118,54 +333,280 @@ class Main:
         :class:`requetes_meteo.OpenMeteo`
         :func:`modele_deplacement_turbulence.deplacement_turbulence`
         """
-        while True:
-            # 1) Acquisition ADS-B
-            states = OpenSky().get_json(self.bbox)
-
-            # 2) Détection de turbulences sur la fenêtre courante
-            turbulences_recentes = self.detector.update(states)
-
-            # 3) Fusion / initialisation
-            if turbulences_recentes.size:
-                if self.turbulences_actives.size:
-                    meteo_old = OpenMeteo(self.turbulences_actives).resultats
-                    turbulences_deplacees = deplacement_turbulence(
-                        self.turbulences_actives, meteo_old
-                    )
-
-                    self.turbulences_actives = np.vstack(
-                        (turbulences_deplacees, turbulences_recentes)
-                    )
-                else:
-                    # Première détection du run
-                    self.turbulences_actives = turbulences_recentes.copy()
-
-                with self.lock:
-                    self.to_display = self.turbulences_actives.copy()
-
-            # 4) Pas de nouvelles turbulences mais des anciennes encore actives
-            elif self.turbulences_actives.size:
-                meteo_old = OpenMeteo(self.turbulences_actives).resultats
-                turbulences_deplacees = deplacement_turbulence(
-                    self.turbulences_actives, meteo_old
-                )
-
-                with self.lock:
-                    self.to_display = turbulences_deplacees.copy()
+        while not self._arret.is_set():
+            # 1) à 4) Acquisition, détection, fusion et publication
+            self._executer(self.cycle)
 
             # 5) Pause puis advection globale avant la prochaine itération
-            time.sleep(3)
-
-            if self.turbulences_actives.size:
-                meteo_new = OpenMeteo(self.turbulences_actives).resultats
-                turbulences_deplacees = deplacement_turbulence(
-                    self.turbulences_actives, meteo_new
-                )
+            if self._arret.wait(self.periode):
+                break
 
-                with self.lock:
-                    self.to_display = turbulences_deplacees.copy()
+            self._executer(self._demi_cycle)
 
             # Deuxième pause pour conserver la cadence ~3 s par demi-cycle
-            time.sleep(3)
-
+            self._arret.wait(self.periode)
+
+    def _demi_cycle(self):
+        """Advection et publication entre deux acquisitions ADS-B."""
+        expirees = self._expirer(time.time())
+        if self.turbulences_actives.size or expirees.size:
+            self.publier(*self._advection(time.time())[:2])
+
+    def _executer(self, etape):
+        """Exécute une étape de :meth:`loop` ; une erreur est journalisée sans arrêter le thread."""
+        try:
+            etape()
+        except Exception:
+            self.echecs += 1
+            journal.exception("Demi-cycle de collecte en échec (%d depuis le lancement)",
+                              self.echecs)
+
+    def cycle(self):
+        """
+        Exécute un cycle de collecte, sans pause (étapes 1 à 4 de :meth:`loop`).
 
+        Appelable directement, hors thread, par exemple pour mesurer la
+        latence du pipeline (:mod:`banc_essai`).
+        """
+        # 0) Retrait des cellules expirées, avant tout travail météo
+        expirees = self._expirer(time.time())
+
+        # 1) Acquisition ADS-B
+        states = self.opensky.get_json(self.bbox)
+
+        # 2) Détection de turbulences sur la fenêtre courante
+        turbulences_recentes = self.detector.update(states)
+        # Préchauffage des vents là où des cellules vont probablement apparaître
+        OpenMeteo.prechauffer(self.detector.positions_a_surveiller(), self.url_meteo)
+        if self.stockage is not None:
+            self.stockage.ajouter(turbulences_recentes, TYPE_EVENEMENT)
+        if self.climatologie is not None:
+            self.climatologie.ajouter(turbulences_recentes)
+
+        # 3) Fusion / initialisation
+        if turbulences_recentes.size:
+            maintenant = time.time()
+            if self.turbulences_actives.size:
+                cellules, identifiants, demi_vies = self._advection(maintenant)
+                # Seule une advection conservée dans l'état actif est archivée :
+                # les republications intermédiaires repartent du même état
+                if self.stockage is not None:
+                    self.stockage.ajouter(cellules, TYPE_ADVECTION, maintenant)
+                # Cellules éteintes pendant l'advection : plus d'échéance à suivre
+                self.echeancier.retirer(
+                    np.setdiff1d(self.identifiants, identifiants, assume_unique=True))
+                self._ranger(cellules, identifiants, demi_vies)
+            self._instant_advection = maintenant
+
+            # Avions traversant une zone déjà signalée : renforcement de la cellule
+            if self.fusion:
+                turbulences_recentes = self._renforcer(turbulences_recentes, maintenant)
+            self.ajouter_cellules(turbulences_recentes, maintenant)
+            self.publier(self.turbulences_actives, self.identifiants)
+
+        # 4) Pas de nouvelles turbulences mais des anciennes encore actives
+        #    (ou des cellules tout juste expirées à retirer de l'affichage)
+        elif self.turbulences_actives.size or expirees.size:
+            self.publier(*self._advection(time.time())[:2])
+
+    def ajouter_cellules(self, cellules, horodatage=None):
+        """
+        Ajoute des cellules à l’état actif, sans les publier.
+
+        Chaque cellule reçoit un identifiant, une échéance
+        (``horodatage + duree_vie``) et la demi-vie ``demi_vie`` ; la
+        capacité ``capacite_max`` est ensuite appliquée.
+
+        :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+        :type cellules: numpy.ndarray
+        :param horodatage: Instant de détection (secondes epoch) ; maintenant par défaut.
+        :type horodatage: float, optional
+        :return: Identifiants attribués.
+        :rtype: numpy.ndarray
+        """
+        horodatage = horodatage or time.time()
+        identifiants = self._nouveaux_identifiants(len(cellules))
+        self.echeancier.ajouter(identifiants, horodatage)
+        self._ranger(np.vstack((self.turbulences_actives, cellules)),
+                     np.concatenate((self.identifiants, identifiants)),
+                     np.concatenate((self.demi_vies, np.full(len(cellules), float(self.demi_vie)))))
+        self._limiter()
+        return identifiants
+
+    def _renforcer(self, cellules, maintenant):
+        """
+        Fusionne de nouvelles cellules avec les cellules actives voisines.
+
+        Seules les cellules actives signalées depuis moins de
+        :data:`fusion.ECART_T_S` (échéance prolongée à chaque signalement)
+        sont candidates. Une cellule renforcée garde son identifiant,
+        reçoit la confiance combinée, une nouvelle échéance et la demi-vie
+        ``demi_vie`` ; les cellules actives reliées par la même détection
+        sont absorbées.
+
+        :param cellules: Tableau *(M, 5)* des nouvelles cellules.
+        :type cellules: numpy.ndarray
+        :param maintenant: Instant de détection (secondes epoch).
+        :type maintenant: float
+        :return: Les nouvelles cellules sans voisine active, à ajouter.
+        :rtype: numpy.ndarray
+        """
+        signalements = self.echeancier.echeances_de(self.identifiants) - self.echeancier.duree_vie
+        candidates = np.flatnonzero(signalements >= maintenant - ECART_T_S)
+        if not candidates.size:
+            return cellules
+
+        fusionnees, representants, absorbees = renforcer_cellules(
+            self.turbulences_actives[candidates], signalements[candidates],
+            cellules, np.full(len(cellules), maintenant))
+        renforcees = representants >= 0
+        lignes = candidates[representants[renforcees]]
+        absorbees = candidates[absorbees]
+
+        actives = self.turbulences_actives.copy()
+        actives[lignes] = fusionnees[renforcees]
+        demi_vies = self.demi_vies.copy()
+        demi_vies[lignes] = self.demi_vie
+        self.echeancier.ajouter(self.identifiants[lignes], maintenant)
+        self.echeancier.retirer(self.identifiants[absorbees])
+
+        # L'altitude d'une cellule renforcée peut changer de bande : nouveau tri
+        masque = np.ones(len(actives), dtype=bool)
+        masque[absorbees] = False
+        self._ranger(actives[masque], self.identifiants[masque], demi_vies[masque])
+        return fusionnees[~renforcees]
+
+    def _ranger(self, cellules, identifiants, demi_vies):
+        """Remplace l’état actif, rangé par bande d'altitude (tranches contiguës)."""
+        self.turbulences_actives, (self.identifiants, self.demi_vies), self.debuts_bandes = \
+            trier_par_bande(cellules, identifiants, demi_vies)
+
+    def _conserver(self, masque):
+        """Ne garde que les cellules actives du masque (l’ordre par bande est préservé)."""
+        self.turbulences_actives = self.turbulences_actives[masque]
+        self.identifiants = self.identifiants[masque]
+        self.demi_vies = self.demi_vies[masque]
+        self.debuts_bandes = debuts_bandes(self.turbulences_actives)
+
+    def _expirer(self, maintenant):
+        """Retire les cellules arrivées à échéance ; renvoie leurs identifiants."""
+        expirees = self.echeancier.expirer(maintenant)
+        if expirees.size:
+            self._conserver(~np.isin(self.identifiants, expirees, assume_unique=True))
+        return expirees
+
+    def _limiter(self):
+        """Évince les cellules les moins sûres au-delà de ``capacite_max``."""
+        exces = len(self.turbulences_actives) - self.capacite_max
+        if exces > 0:
+            evincees = np.argpartition(self.turbulences_actives[:, 4], exces - 1)[:exces]
+            masque = np.ones(len(self.turbulences_actives), dtype=bool)
+            masque[evincees] = False
+            self.echeancier.retirer(self.identifiants[evincees])
+            self._conserver(masque)
+
+    def _advection(self, maintenant):
+        """
+        Fait dériver les cellules actives bande par bande.
+
+        Chaque bande n’occasionne qu’une requête météo groupée (un seul
+        niveau de pression). La confiance de chaque cellule décroît selon sa
+        demi-vie depuis la dernière advection conservée. Le cisaillement
+        pouvant faire changer une cellule de bande, le résultat est trié à
+        nouveau.
+
+        :param maintenant: Instant de l’advection (secondes epoch).
+        :type maintenant: float
+        :return: ``(cellules, identifiants, demi_vies)`` triés par bande.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        facteurs = 0.5 ** ((maintenant - self._instant_advection) / self.demi_vies)
+
+        deplacees, identifiants, demi_vies = [], [], []
+        for bande in bandes_occupees(self.debuts_bandes):
+            t = tranche(self.debuts_bandes, bande)
+            cellules = self.turbulences_actives[t]
+            meteo = OpenMeteo(cellules, url=self.url_meteo).resultats
+            deplacees.append(deplacement_turbulence(cellules, meteo, facteur_confiance=facteurs[t]))
+            conserve = masque_conservation(cellules, facteurs[t])
+            identifiants.append(self.identifiants[t][conserve])
+            demi_vies.append(self.demi_vies[t][conserve])
+
+        turbulences_deplacees = np.concatenate(deplacees or [np.empty((0, 5))])
+        turbulences_deplacees, alignes, _ = trier_par_bande(
+            turbulences_deplacees,
+            np.concatenate(identifiants or [np.empty(0, dtype=np.int64)]),
+            np.concatenate(demi_vies or [np.empty(0)]))
+        return (turbulences_deplacees, *alignes)
+
+    def cellules_bande(self, bande, lat=None, lon=None):
+        """
+        Cellules publiées d’une bande d’altitude, éventuellement dans une zone.
+
+        Seule la tranche de la bande est parcourue, par exemple pour
+        « qu’y a-t-il au FL350 sur cette région ? » ::
+
+            collecteur.cellules_bande(bande_du_niveau_de_vol(350), lat=(40, 55), lon=(-80, -50))
+
+        :param bande: Indice de bande (cf. :func:`bandes.bande_du_niveau_de_vol`).
+        :type bande: int
+        :param lat: Bornes ``(min, max)`` de latitude, facultatives.
+        :type lat: tuple[float, float], optional
+        :param lon: Bornes ``(min, max)`` de longitude ; ``min > max`` franchit
+            l’antiméridien.
+        :type lon: tuple[float, float], optional
+        :return: ``(cellules, identifiants)`` de la bande.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        with self.lock:
+            t = tranche(self.debuts_display, bande)
+            cellules, identifiants = self.to_display[t], self.ids_display[t]
+        masque = masque_zone(cellules, lat, lon)
+        return cellules[masque].copy(), identifiants[masque].copy()
+
+    def _nouveaux_identifiants(self, n):
+        """Attribue ``n`` identifiants de cellule jamais utilisés."""
+        ids = np.arange(self._prochain_id, self._prochain_id + n, dtype=np.int64)
+        self._prochain_id += n
+        return ids
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Collecteur de turbulences headless.")
+    parser.add_argument("--memoire-partagee", metavar="NOM",
+                        help="nom du segment partagé lu par le tableau de bord")
+    parser.add_argument("--capacite", type=int, default=100_000,
+                        help="nombre maximal de cellules publiées")
+    parser.add_argument("--port-http", type=int,
+                        help="port du serveur HTTP de diffusion des cellules")
+    parser.add_argument("--stockage", metavar="DOSSIER",
+                        help="dossier d'archivage des turbulences sur disque")
+    parser.add_argument("--climatologie", metavar="FICHIER",
+                        help="fichier .npz de la densité climatologique")
+    args = parser.parse_args()
+
+    tampon = None
+    if args.memoire_partagee:
+        tampon = TamponPartage(args.memoire_partagee, args.capacite, creer=True)
+    stockage = MagasinEvenements(args.stockage) if args.stockage else None
+    climatologie = RasterDensite(fichier=args.climatologie) if args.climatologie else None
+    collecteur = Main(tampon=tampon, stockage=stockage, climatologie=climatologie).start()
+    serveur = None
+    if args.port_http:
+        serveur = ServeurCellules(collecteur, port=args.port_http).start()
+    try:
+        while collecteur.en_cours:
+            collecteur._thread.join(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if serveur is not None:
+            serveur.stop()
+        collecteur.stop(timeout=20)
+        if tampon is not None:
+            tampon.fermer()
+        if stockage is not None:
+            stockage.fermer()
+        if climatologie is not None:
+            climatologie.sauvegarder()
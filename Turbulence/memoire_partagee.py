@@ -0,0 +1,256 @@
+"""
+memoire_partagee.py ― Transport des cellules actives entre processus
+====================================================================
+
+Module de transport du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Lorsque le collecteur :class:`main.Main` tourne dans son propre processus
+(``python main.py --memoire-partagee NOM``), il publie le tableau des
+cellules actives dans un segment :mod:`multiprocessing.shared_memory` que le
+tableau de bord Streamlit lit sans copie.
+
+Disposition du segment
+----------------------
+* **En-tête** – 6 entiers ``int64`` : ``[sequence, emplacement, nombre,
+  generation, lancement, pid]``, ``lancement`` étant l’instant de création
+  du segment (ns) : il distingue deux exécutions successives du collecteur,
+  dont les générations repartent de 1 ; ``pid`` est le processus écrivain.
+* **Données** – deux emplacements ``float32`` de forme
+  *(capacite, 5)* (double tampon).
+
+L’écrivain remplit toujours l’emplacement inactif puis bascule l’en-tête.
+Le compteur ``sequence`` suit le principe d’un *seqlock* : impair pendant
+une écriture, pair au repos. Un lecteur qui a obtenu une vue à la séquence
+``s`` sait que ses données restent intactes tant que la séquence courante
+est inférieure à ``s + 3`` (l’écrivain n’a pas recommencé à écrire dans cet
+emplacement).
+
+Un collecteur interrompu en pleine écriture laisse la séquence impaire :
+:meth:`TamponPartage.lire` n’attend alors qu’un temps borné et renvoie la
+dernière publication cohérente, marquée ``perime``. Un lecteur détecte le
+redémarrage du collecteur avec :meth:`TamponPartage.est_remplace`.
+
+Un nouveau collecteur ne remplace un segment existant de même nom que si
+son écrivain est mort (:meth:`TamponPartage.ecrivain_mort`) ; sinon la
+création échoue avec :class:`FileExistsError`.
+"""
+
+
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+class TamponPartage:
+    """
+    Tampon circulaire à double emplacement en mémoire partagée.
+
+    Parameters
+    ----------
+    nom : str
+        Nom du segment partagé (identique côté écrivain et lecteur).
+    capacite : int, default ``100_000``
+        Nombre maximal de cellules publiables ; l’excédent est tronqué.
+    creer : bool, default ``False``
+        ``True`` côté collecteur (création du segment), ``False`` côté
+        lecteur (rattachement à un segment existant).
+
+    Attributes
+    ----------
+    capacite : int
+        Capacité effective lue dans la taille du segment.
+    en_tete : numpy.ndarray
+        Vue ``int64`` sur ``[sequence, emplacement, nombre, generation, lancement, pid]``.
+    emplacements : numpy.ndarray
+        Vue ``float32`` de forme *(2, capacite, 5)*.
+    lancement : int
+        Instant de création du segment (ns), lu à l’ouverture.
+    perime : bool
+        ``True`` si la dernière lecture n’a pas obtenu de publication
+        cohérente à temps (écrivain arrêté en pleine écriture).
+    """
+
+    NB_COLONNES = 5
+    TAILLE_EN_TETE = 6 * 8
+
+    def __init__(self, nom, capacite=100_000, creer=False):
+        self.nom = nom
+        self.createur = creer
+        self.perime = False
+        self._derniere = (0, 0, 0, 0)           # (emplacement, nombre, generation, sequence)
+        if creer:
+            taille = self.TAILLE_EN_TETE + 2 * capacite * self.NB_COLONNES * 4
+            try:
+                self.shm = shared_memory.SharedMemory(name=nom, create=True, size=taille)
+            except FileExistsError:
+                # Segment laissé par un collecteur qui n'a pas pu le supprimer ;
+                # celui d'un collecteur encore actif n'est jamais remplacé
+                ancien = TamponPartage(nom)
+                mort = ancien.ecrivain_mort()
+                ancien.fermer()
+                if not mort:
+                    raise FileExistsError(
+                        f"Le segment « {nom} » est publié par un collecteur actif") from None
+                # Le lecteur s'était désinscrit du resource_tracker (cf. plus bas)
+                resource_tracker.register(ancien.shm._name, "shared_memory")
+                ancien.shm.unlink()
+                self.shm = shared_memory.SharedMemory(name=nom, create=True, size=taille)
+        else:
+            self.shm = shared_memory.SharedMemory(name=nom)
+            # Le lecteur ne doit pas détruire le segment à sa sortie
+            # (comportement par défaut du resource_tracker avant Python 3.13)
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+            capacite = ((self.shm.size - self.TAILLE_EN_TETE)
+                        // (2 * self.NB_COLONNES * 4))
+
+        self.capacite = capacite
+        self.en_tete = np.ndarray((6,), dtype=np.int64, buffer=self.shm.buf)
+        self.emplacements = np.ndarray(
+            (2, capacite, self.NB_COLONNES), dtype=np.float32,
+            buffer=self.shm.buf, offset=self.TAILLE_EN_TETE)
+        if creer:
+            self.en_tete[:4] = 0
+            self.en_tete[4] = time.time_ns()
+            self.en_tete[5] = os.getpid()
+        self.lancement = int(self.en_tete[4])
+
+    def ecrire(self, cellules, generation):
+        """
+        Publie un nouveau tableau de cellules (côté collecteur uniquement).
+
+        :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+        :type cellules: numpy.ndarray
+        :param generation: Numéro de génération associé à la publication.
+        :type generation: int
+        """
+        n = min(len(cellules), self.capacite)
+        suivant = 1 - int(self.en_tete[1])
+
+        self.en_tete[0] += 1                      # impair : écriture en cours
+        if n:
+            self.emplacements[suivant, :n] = cellules[:n]
+        self.en_tete[1] = suivant
+        self.en_tete[2] = n
+        self.en_tete[3] = generation
+        self.en_tete[0] += 1                      # pair : publication visible
+
+    def lire(self, tentatives=200, pause=0.0005):
+        """
+        Renvoie une vue sans copie sur la dernière publication cohérente.
+
+        Si l’écrivain n’a pas terminé au bout de ``tentatives`` essais
+        espacés de ``pause`` secondes (collecteur arrêté en pleine
+        écriture), la dernière publication lue avec succès est renvoyée et
+        ``perime`` passe à ``True``.
+
+        :param tentatives: Nombre maximal d’essais.
+        :type tentatives: int
+        :param pause: Attente (s) entre deux essais.
+        :type pause: float
+        :return: ``(cellules, generation, sequence)`` où ``cellules`` est une
+            vue ``float32`` *(N, 5)* et ``sequence`` le jeton à passer à
+            :meth:`est_valide` après exploitation de la vue.
+        :rtype: tuple[numpy.ndarray, int, int]
+        """
+        for _ in range(tentatives):
+            sequence = int(self.en_tete[0])
+            if sequence % 2 == 0:
+                emplacement, n, generation = (int(v) for v in self.en_tete[1:4])
+                if int(self.en_tete[0]) == sequence:
+                    self.perime = False
+                    self._derniere = (emplacement, n, generation, sequence)
+                    return self.emplacements[emplacement, :n], generation, sequence
+            time.sleep(pause)                     # écriture en cours
+
+        self.perime = True
+        emplacement, n, generation, sequence = self._derniere
+        return self.emplacements[emplacement, :n], generation, sequence
+
+    def copier(self, tentatives=3):
+        """
+        Renvoie une copie validée de la dernière publication.
+
+        La copie est recommencée si l’emplacement a été réécrit pendant
+        qu’elle était faite (:meth:`est_valide`).
+
+        :param tentatives: Nombre maximal de copies.
+        :type tentatives: int
+        :return: ``(cellules, generation)``.
+        :rtype: tuple[numpy.ndarray, int]
+        """
+        for _ in range(tentatives):
+            vue, generation, sequence = self.lire()
+            cellules = vue.copy()
+            if self.perime or self.est_valide(sequence):
+                break
+        return cellules, generation
+
+    def est_valide(self, sequence):
+        """
+        Indique si une vue obtenue à ``sequence`` n’a pas été réécrite.
+
+        :param sequence: Jeton renvoyé par :meth:`lire`.
+        :type sequence: int
+        :rtype: bool
+        """
+        return int(self.en_tete[0]) < sequence + 3
+
+    def ecrivain_mort(self, attente=0.5):
+        """
+        Indique si l’écrivain du segment ne publiera plus.
+
+        C’est le cas si son processus n’existe plus, ou si la séquence reste
+        impaire (écriture interrompue) pendant ``attente`` secondes.
+
+        :param attente: Durée d’observation d’une séquence impaire (s).
+        :type attente: float
+        :rtype: bool
+        """
+        try:
+            os.kill(int(self.en_tete[5]), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass                                  # processus d'un autre utilisateur
+
+        sequence = int(self.en_tete[0])
+        if sequence % 2 == 0:
+            return False
+        time.sleep(attente)
+        return int(self.en_tete[0]) == sequence
+
+    def est_remplace(self):
+        """
+        Indique si le segment nommé a disparu ou a été recréé depuis l’ouverture.
+
+        C’est le cas lorsque le collecteur a redémarré : ce tampon pointe
+        alors sur l’ancien segment, qu’il faut abandonner pour se rattacher
+        au nouveau.
+
+        :rtype: bool
+        """
+        try:
+            actuel = TamponPartage(self.nom)
+        except FileNotFoundError:
+            return True
+        try:
+            return actuel.lancement != self.lancement
+        finally:
+            actuel.fermer()
+
+    def fermer(self):
+        """
+        Détache le segment ; le créateur le supprime également.
+
+        Si des vues renvoyées par :meth:`lire` sont encore utilisées, le
+        segment n’est détaché qu’à leur libération.
+        """
+        del self.en_tete, self.emplacements
+        try:
+            self.shm.close()
+        except BufferError:
+            pass                                  # vues encore exportées
+        if self.createur:
+            self.shm.unlink()
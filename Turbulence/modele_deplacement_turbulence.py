@@ -1,19 +1,48 @@
 """
 Simulation de l'évolution des zones de turbulence en fonction des conditions météorologiques.
 
-Ce module contient une fonction principale :
+Ce module contient deux fonctions :
 - `deplacement_turbulence` : simule le déplacement, l'altération de taille, d'altitude et la perte de confiance
   des zones de turbulence, sous l'effet du vent et du cisaillement vertical de l'air. Le déplacement est calculé
   en tenant compte de la vitesse et direction du vent, et de l'évolution verticale induite par les gradients
   de vent (cisaillements haut et bas).
+- `masque_conservation` : indique quelles zones survivent à un pas de simulation, ce qui permet
+  de suivre leur identité d'un pas à l'autre.
 
 La sortie est un tableau numpy mis à jour représentant les nouvelles zones de turbulence significatives,
-filtrées selon leur niveau de confiance restant.
+filtrées selon leur niveau de confiance restant. Tous les calculs sont vectorisés sur l'ensemble des zones
+et le déplacement suit la sphère terrestre (:func:`geodesie.destination`).
 """
 
 import numpy as np
 
-def deplacement_turbulence(turbulence_data, meteo_data, delta_t=60):
+from geodesie import destination
+
+#Perte de confiance appliquée à chaque pas et seuil de disparition
+FACTEUR_CONFIANCE = 0.95
+SEUIL_CONFIANCE = 0.2
+
+
+def masque_conservation(turbulence_data, facteur_confiance=FACTEUR_CONFIANCE):
+    """
+        Indique quelles zones de turbulence sont conservées par `deplacement_turbulence`.
+
+        Les lignes renvoyées par `deplacement_turbulence` correspondent, dans l'ordre,
+        aux lignes de ``turbulence_data`` pour lesquelles ce masque vaut ``True``.
+
+        :param turbulence_data: Tableau (N, 5) des zones de turbulence.
+        :type turbulence_data: numpy.ndarray
+
+        :param facteur_confiance: Facteur de confiance appliqué au pas, scalaire ou par zone (N,).
+        :type facteur_confiance: float or numpy.ndarray
+
+        :return: Masque booléen de longueur N.
+        :rtype: numpy.ndarray
+        """
+    return turbulence_data[:, 4] * facteur_confiance > SEUIL_CONFIANCE
+
+
+def deplacement_turbulence(turbulence_data, meteo_data, delta_t=60, facteur_confiance=FACTEUR_CONFIANCE):
     """
         Simule le déplacement et l'évolution des zones de turbulence sous l'effet du vent et du cisaillement.
 
@@ -36,49 +65,35 @@ def deplacement_turbulence(turbulence_data, meteo_data, delta_t=60):
         :param delta_t: Durée du pas de temps en secondes pour le calcul du déplacement. Par défaut : 60.
         :type delta_t: float
 
+        :param facteur_confiance: Facteur multipliant la confiance, scalaire ou par zone (N,),
+            p. ex. ``0.5 ** (dt / demi_vie)`` pour une demi-vie propre à chaque zone.
+            Par défaut : ``FACTEUR_CONFIANCE``.
+        :type facteur_confiance: float or numpy.ndarray
+
         :return: Un tableau numpy contenant les nouvelles zones de turbulence conservées,
             avec leurs nouvelles positions, altitudes, diamètres et niveaux de confiance.
         :rtype: numpy.ndarray
         """
-    # Constantes pour conversion approximative
-    METERS_PER_DEG_LAT = 111_000
-    METERS_PER_DEG_LON = 85_000  # à adapter selon latitude pour plus de précision
-
-    new_data = []
-
-    for i in range(turbulence_data.shape[0]):
-        lat, lon, alt, diam, conf = turbulence_data[i]
-        vitesse, direction_deg, cis_haut, cis_bas = meteo_data[i]
-
-        # Déplacement horizontal causé par le vent
-        direction_rad = np.deg2rad(direction_deg)
-        dx = vitesse * delta_t * np.cos(direction_rad)  # en mètres
-        dy = vitesse * delta_t * np.sin(direction_rad)
-
-        # Conversion en degrés
-        dlon = dx / METERS_PER_DEG_LON
-        dlat = dy / METERS_PER_DEG_LAT
-
-        # Modification de l'altitude basée sur le cisaillement (simplifiée)
-        delta_alt = (cis_haut - cis_bas) * 0.1  # facteur arbitraire à calibrer
-
-        # Expansion ou contraction du diamètre
-        delta_diam = (abs(cis_haut) + abs(cis_bas)) * 0.01  # facteur arbitraire
-
-        nouvelle_confiance = conf*0.95
-
-        if nouvelle_confiance <= 0.2:
-            continue
-
-        new_data.append([
-            lat + dlat,
-            lon + dlon,
-            alt + delta_alt,
-            max(diam + delta_diam, 0),  # éviter diamètre négatif
-            nouvelle_confiance,
-        ])
-
-
-    return np.array(new_data)
-
-
+    facteur_confiance = np.broadcast_to(facteur_confiance, len(turbulence_data))
+    conserve = masque_conservation(turbulence_data, facteur_confiance)
+    lat, lon, alt, diam, conf = turbulence_data[conserve].T
+    vitesse, direction_deg, cis_haut, cis_bas = meteo_data[conserve].T
+
+    # Déplacement horizontal causé par le vent : la direction météo indique
+    # d'où vient le vent, la zone dérive donc vers direction + 180°
+    nouvelle_lat, nouvelle_lon = destination(
+        lat, lon, direction_deg + 180, vitesse * delta_t / 1000)
+
+    # Modification de l'altitude basée sur le cisaillement (simplifiée)
+    delta_alt = (cis_haut - cis_bas) * 0.1  # facteur arbitraire à calibrer
+
+    # Expansion ou contraction du diamètre
+    delta_diam = (np.abs(cis_haut) + np.abs(cis_bas)) * 0.01  # facteur arbitraire
+
+    return np.column_stack((
+        nouvelle_lat,
+        nouvelle_lon,
+        alt + delta_alt,
+        np.maximum(diam + delta_diam, 0),  # éviter diamètre négatif
+        conf * facteur_confiance[conserve],
+    )).reshape(-1, 5)
@@ -11,12 +11,27 @@ cellule turbulente détectée :
 * direction du vent (degrés) ;
 * cisaillement vertical juste au-dessus et juste au-dessous.
 
+Les réponses sont conservées dans un cache partagé (clé : position
+arrondie à ``pas_cache`` degrés et niveau de pression), valable
+``duree_cache`` secondes. :meth:`OpenMeteo.prechauffer` le remplit en
+arrière-plan pour les avions en cours d’instabilité, afin que les cellules
+fraîchement confirmées soient déplacées sans attendre l’API.
+
+Les points manquants d’un même niveau de pression sont demandés en une
+seule requête (coordonnées séparées par des virgules), par lots de
+``taille_lot``.
+
 """
 
 
+import threading
+import time
+
 import requests
 import numpy as np
 
+from geodesie import altitude_vers_hpa
+
 
 class OpenMeteo:
 
@@ -27,22 +42,35 @@ class OpenMeteo:
         [1000, 975, 950, 925, 900, 850, 800, 700, 600,
          500, 400, 300, 250,200, 150, 100, 70, 50, 30])
 
-    def __init__(self, array):
+    #Cache des vents : {(url, i_lat, i_lon, niveau): (horodatage, (vitesse, direction, cis_haut, cis_bas))}
+    pas_cache = 0.25          # résolution (degrés) des clés du cache
+    duree_cache = 900         # durée de validité (s) d'une entrée
+    taille_max_cache = 50_000
+    taille_lot = 100          # coordonnées par requête groupée
+    _cache = {}
+    _en_vol = set()           # clés en cours de préchauffage
+    _verrou_cache = threading.Lock()
+
+    def __init__(self, array, url=None):
         """
-        `array` : ndarray (N, 3) – lat, lon, alt [ft]
+        `array` : ndarray (N, 3) – lat, lon, alt [m]
+        `url` : URL de l'API à utiliser à la place de `OpenMeteo.url`
+        (p. ex. :class:`serveurs_simules.SimulateurOpenMeteo`)
 
         À l'instanciation :
-        1) conversion pieds → hPa
+        1) conversion mètres → hPa
         2) requêtes API
         3) stockage des résultats dans `self.resultats` (ndarray (N, 2))
         """
+        if url:
+            self.url = url
         self.resultats = (
             self.donnees_vent(self.conversion_altitude_en_hpa(array)))
 
     @staticmethod
-    def conversion_altitude_en_hpa(arr_ft):
+    def conversion_altitude_en_hpa(arr_m):
         """
-        Convertit un tableau de coordonnées (latitude, longitude, altitude en pieds)
+        Convertit un tableau de coordonnées (latitude, longitude, altitude en mètres)
         en un tableau identique dont l'altitude est remplacée par une estimation de la
         pression atmosphérique standard (en hPa), selon l’atmosphère standard ISA.
 
@@ -51,18 +79,20 @@ class OpenMeteo:
 
             P = P0 * (1 - (L * h / T0)) ^ (g*M / (R*L))
 
-        :param arr_ft: Un tableau numpy de forme (N, 3), où chaque ligne correspond à
-            un point géographique. La troisième colonne représente l'altitude en pieds.
-        :type arr_ft: numpy.ndarray
+        (voir :func:`geodesie.altitude_vers_hpa`, qui traite aussi la
+        tropopause isotherme au-dessus de 11 km).
+
+        :param arr_m: Un tableau numpy de forme (N, 3), où chaque ligne correspond à
+            un point géographique. La troisième colonne représente l'altitude en mètres
+            (convertie par :func:`geodesie.altitude_vers_hpa`).
+        :type arr_m: numpy.ndarray
 
         :return: Une copie du tableau d’entrée de forme (N, 3), où la troisième colonne
             contient la pression atmosphérique estimée en hPa, calculée selon l’altitude.
         :rtype: numpy.ndarray
         """
-        out = arr_ft.copy()  # ne modifie pas l’original
-        z_m = out[:, 2] # mètres
-        p0, L, T0, gM_RL = 1013.25, 0.0065, 288.15, 5.255877
-        out[:, 2] = p0 * (1 - L * z_m / T0) ** gM_RL
+        out = arr_m.copy()  # ne modifie pas l’original
+        out[:, 2] = altitude_vers_hpa(out[:, 2])  # altitude en mètres
         return out
 
 
@@ -71,11 +101,188 @@ class OpenMeteo:
         """Renvoie le niveau (hPa) le plus proche parmi ceux acceptés par l’API."""
         return self.niveaux_possibles[np.abs(self.niveaux_possibles - hpa).argmin()]
 
+    @classmethod
+    def cle_cache(cls, lat, lon, niveau, url=None):
+        """Clé de cache d’un point : URL de l’API, position arrondie à ``pas_cache`` et niveau (hPa)."""
+        return (url or cls.url, int(round(lat / cls.pas_cache)), int(round(lon / cls.pas_cache)),
+                int(niveau))
+
+    @classmethod
+    def vider_cache(cls):
+        """Vide le cache des vents (p. ex. avant une mesure à froid)."""
+        with cls._verrou_cache:
+            cls._cache = {}
+
+    @classmethod
+    def _lire_cache(cls, cle, maintenant):
+        """Renvoie l’entrée valide associée à ``cle``, ou ``None``."""
+        with cls._verrou_cache:
+            entree = cls._cache.get(cle)
+        if entree is not None and maintenant - entree[0] < cls.duree_cache:
+            return entree[1]
+        return None
+
+    @classmethod
+    def _ecrire_cache(cls, cle, vent):
+        maintenant = time.time()
+        with cls._verrou_cache:
+            if len(cls._cache) >= cls.taille_max_cache:
+                # Purge des entrées expirées avant de grossir davantage
+                cls._cache = {c: e for c, e in cls._cache.items()
+                              if maintenant - e[0] < cls.duree_cache}
+            cls._cache[cle] = (maintenant, vent)
+
+    @classmethod
+    def _requete_lot(cls, url, niveau, positions):
+        """
+        Interroge l’API pour plusieurs positions d’un même niveau en une requête
+        (coordonnées séparées par des virgules), par lots de ``taille_lot``.
+
+        :param url: URL de l’API.
+        :param niveau: Niveau de pression (hPa) disponible.
+        :param positions: Liste de couples ``(i_lat, i_lon)`` de clés de cache.
+        :return: Un tuple ``(vitesse, direction, cis_haut, cis_bas)`` par position.
+        :rtype: list[tuple]
+        """
+        # Récupération des niveaux supérieurs et inférieurs (bornés aux extrémités)
+        indice_niveau = int(np.where(cls.niveaux_possibles == niveau)[0][0])
+        niveau_plus = int(cls.niveaux_possibles[min(indice_niveau + 1, len(cls.niveaux_possibles) - 1)])
+        niveau_moins = int(cls.niveaux_possibles[max(indice_niveau - 1, 0)])
+
+        niveaux_a_demander = (
+            f"wind_speed_{niveau_moins}hPa",
+            f"wind_speed_{niveau}hPa",
+            f"wind_speed_{niveau_plus}hPa",
+            f"wind_direction_{niveau}hPa")
+
+        vents = []
+        for debut in range(0, len(positions), cls.taille_lot):
+            lot = positions[debut:debut + cls.taille_lot]
+            params = {
+                "latitude": ",".join(f"{i_lat * cls.pas_cache:g}" for i_lat, _ in lot),
+                "longitude": ",".join(f"{i_lon * cls.pas_cache:g}" for _, i_lon in lot),
+                "hourly": ",".join(niveaux_a_demander),
+                "timezone": "UTC",
+            }
+            #On récupère le résultat de la requête à l'api (une liste si plusieurs points)
+            reponse = requests.get(url, params=params, timeout=10).json()
+            if isinstance(reponse, dict):
+                reponse = [reponse]
+
+            for point in reponse:
+                hourly = point["hourly"]
+                #Vitesse et direction du vent, puis cisaillements verticaux
+                vitesse = hourly[f"wind_speed_{niveau}hPa"][0]
+                direction = hourly[f"wind_direction_{niveau}hPa"][0]
+                vents.append((vitesse, direction,
+                              hourly[f"wind_speed_{niveau_plus}hPa"][0] - vitesse,
+                              vitesse - hourly[f"wind_speed_{niveau_moins}hPa"][0]))
+        return vents
+
+    @classmethod
+    def vents(cls, lat, lon, niveau, url=None):
+        """
+        Vents de plusieurs points d’un même niveau, lus dans le cache ou
+        demandés en une seule requête groupée pour les points manquants.
+
+        :param lat: Latitudes *(N,)*.
+        :param lon: Longitudes *(N,)*.
+        :param niveau: Niveau de pression (hPa) disponible.
+        :param url: URL de l’API, :attr:`url` par défaut.
+        :return: Tableau *(N, 4)* ``[vitesse, direction, cis_haut, cis_bas]``.
+        :rtype: numpy.ndarray
+        """
+        cles = [cls.cle_cache(la, lo, niveau, url) for la, lo in zip(np.ravel(lat), np.ravel(lon))]
+        maintenant = time.time()
+        trouves = {}
+        for cle in set(cles):
+            vent = cls._lire_cache(cle, maintenant)
+            if vent is not None:
+                trouves[cle] = vent
+
+        manquantes = [cle for cle in dict.fromkeys(cles) if cle not in trouves]
+        if manquantes:
+            url = manquantes[0][0]
+            reponses = cls._requete_lot(url, int(niveau), [cle[1:3] for cle in manquantes])
+            for cle, vent in zip(manquantes, reponses):
+                cls._ecrire_cache(cle, vent)
+                trouves[cle] = vent
+
+        return np.array([trouves[cle] for cle in cles], dtype=float).reshape(-1, 4)
+
+    @classmethod
+    def vent_point(cls, lat, lon, niveau, url=None):
+        """
+        Vent au point ``(lat, lon)`` et au niveau ``niveau`` (hPa disponible),
+        lu dans le cache ou demandé à l’API (``url`` ou :attr:`url`).
+
+        :return: ``(vitesse, direction, cisaillement_haut, cisaillement_bas)``.
+        :rtype: tuple[float, float, float, float]
+        """
+        return tuple(cls.vents([lat], [lon], niveau, url)[0])
+
+    @classmethod
+    def prechauffer(cls, positions, url=None):
+        """
+        Remplit le cache en arrière-plan pour une liste de positions.
+
+        Les clés déjà en cache ou en cours de préchauffage sont ignorées ;
+        les autres sont demandées par un thread *daemon*. Une erreur réseau
+        n’interrompt pas l’appelant : la requête sera refaite à la demande.
+
+        :param positions: Tableau *(K, 3)* ``[lat, lon, alt_m]``, par exemple
+            :meth:`turbulence.TurbulenceDetector.positions_a_surveiller`.
+        :type positions: numpy.ndarray
+        :param url: URL de l’API, :attr:`url` par défaut.
+        :type url: str, optional
+        :return: Le thread lancé, ou ``None`` s’il n’y avait rien à demander.
+        :rtype: threading.Thread | None
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        if not len(positions):
+            return None
+
+        pression = altitude_vers_hpa(positions[:, 2])
+        niveaux = cls.niveaux_possibles[
+            np.abs(cls.niveaux_possibles[None, :] - pression[:, None]).argmin(axis=1)]
+        maintenant = time.time()
+        cles = {cls.cle_cache(lat, lon, niv, url) for (lat, lon, _), niv in zip(positions, niveaux)}
+        with cls._verrou_cache:
+            a_demander = [cle for cle in cles
+                          if cle not in cls._en_vol
+                          and maintenant - cls._cache.get(cle, (-np.inf,))[0] >= cls.duree_cache]
+            cls._en_vol.update(a_demander)
+        if not a_demander:
+            return None
+
+        # Une requête groupée par (url, niveau)
+        groupes = {}
+        for cle in a_demander:
+            groupes.setdefault((cle[0], cle[3]), []).append(cle)
+
+        def remplir():
+            for (url_groupe, niveau), cles_groupe in groupes.items():
+                try:
+                    reponses = cls._requete_lot(url_groupe, niveau, [cle[1:3] for cle in cles_groupe])
+                    for cle, vent in zip(cles_groupe, reponses):
+                        cls._ecrire_cache(cle, vent)
+                except (requests.RequestException, KeyError, ValueError, TypeError):
+                    pass
+                finally:
+                    with cls._verrou_cache:
+                        cls._en_vol.difference_update(cles_groupe)
+
+        thread = threading.Thread(target=remplir, daemon=True, name="prechauffage-meteo")
+        thread.start()
+        return thread
+
     def donnees_vent(self, array_hpa):
         """Récupère les données de vent pour un tableau de turbulences actives,
         basé sur leur position géographique et leur niveau de pression en hPa.
 
-        Pour chaque point, cette méthode interroge l’API météo afin de récupérer :
+        Les points sont regroupés par niveau de pression ; pour chaque niveau,
+        cette méthode lit le cache ou interroge l’API météo en une requête
+        groupée (:meth:`vents`) afin de récupérer :
         - la vitesse du vent (m/s)
         - la direction du vent (°)
         - le cisaillement vertical au-dessus et en dessous du point
@@ -97,40 +304,13 @@ class OpenMeteo:
         n = len(array_hpa)
         result = np.empty((n, 4), dtype=float)
 
-        # Itèration sur chaque turbulence active
-        for turb, (lat, lon, niv, _, _) in enumerate(array_hpa):
-
-            # Normalisation du niveau souhaité au plus proche disponible`
-            niveau = int(self.niveau_proche(niv))
+        # Normalisation des niveaux souhaités au plus proche disponible
+        niveaux = self.niveaux_possibles[
+            np.abs(self.niveaux_possibles[None, :] - array_hpa[:, 2, None]).argmin(axis=1)]
 
-            # Récupération des niveaux supérieurs et inférieurs
-            indice_niveau = np.where(self.niveaux_possibles == niveau)[0][0]
-            niveau_plus = int(self.niveaux_possibles[indice_niveau+1])
-            niveau_moins = int(self.niveaux_possibles[indice_niveau-1])
-
-            niveaux_a_demander = (
-                f"wind_speed_{niveau_moins}hPa",
-                f"wind_speed_{niveau}hPa",
-                f"wind_speed_{niveau_plus}hPa,"
-                f"wind_direction_{niveau}hPa")
-
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "hourly": ",".join(niveaux_a_demander),
-                "timezone": "UTC",
-            }
-            #On récupère le résultat de la requête à l'api
-            hourly = requests.get(self.url, params=params, timeout=10).json()["hourly"]
-
-            #Vitesse et direction du vent
-            result[turb, 0] = hourly[f"wind_speed_{niveau}hPa"][0]  # vitesse
-            result[turb, 1] = hourly[f"wind_direction_{niveau}hPa"][0]  # direction
-
-            #Cisaillement verticaux
-            result[turb, 2] = (hourly[f"wind_speed_{niveau_plus}hPa"][0] -
-                               result[turb, 0])
-            result[turb, 3] = (result[turb, 0] -
-                               hourly[f"wind_speed_{niveau_moins}hPa"][0])
+        # Une requête groupée par niveau de pression
+        for niveau in np.unique(niveaux):
+            masque = niveaux == niveau
+            result[masque] = self.vents(array_hpa[masque, 0], array_hpa[masque, 1], niveau, self.url)
 
         return result
@@ -19,6 +19,14 @@ class OpenSky:
         URL d’authentification pour récupérer un token.
     url_json : str
         URL d’accès aux données d’états (positions d’avions).
+
+    Parameters
+    ----------
+    url_json : str | None, optional
+        Remplace l’URL des états (p. ex. un simulateur local,
+        cf. :class:`serveurs_simules.SimulateurOpenSky`).
+    url_token : str | None, optional
+        Remplace l’URL d’authentification.
     """
 
     #Définition de variable de classes
@@ -29,6 +37,12 @@ class OpenSky:
            "realms/opensky-network/protocol/openid-connect/token")
     url_json = "https://opensky-network.org/api/states/all"
 
+    def __init__(self, url_json=None, url_token=None):
+        if url_json:
+            self.url_json = url_json
+        if url_token:
+            self.url_token = url_token
+
 
     def get_token(self):
         """
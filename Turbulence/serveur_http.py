@@ -0,0 +1,281 @@
+"""
+serveur_http.py ― Diffusion HTTP des cellules actives
+=====================================================
+
+Module de diffusion du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Un petit serveur HTTP local, adossé à un collecteur :class:`main.Main`,
+permet à d’autres systèmes (outils d’exploitation, alertes) de s’abonner
+aux cellules turbulentes sans passer par le tableau de bord.
+
+Points d’accès
+--------------
+``GET /instantane``
+    Dernier état complet au format binaire compact (voir :func:`encoder_binaire`).
+``GET /instantane.json``
+    Même contenu en JSON.
+``GET /flux?depuis=G``
+    Flux *Server-Sent Events* : un événement ``delta`` par publication, ne
+    contenant que les cellules ajoutées, déplacées ou expirées depuis la
+    génération ``G`` (état complet si ``G`` n’est plus en mémoire). Les
+    cellules dont seule la confiance a changé d’au moins
+    :data:`PAS_CONFIANCE` sont envoyées à part, en couples ``[id, confiance]``. Sans
+    ``depuis``, l’en-tête standard ``Last-Event-ID`` envoyé par un client
+    SSE qui se reconnecte en tient lieu ; une valeur non entière donne une
+    erreur 400.
+"""
+
+
+import json
+import struct
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+COLONNES = ["latitude", "longitude", "altitude", "diametre", "confiance"]
+
+# En-tête binaire : signature, version, nb de colonnes, génération, nb de cellules
+EN_TETE = struct.Struct("<4sHHQI")
+
+# Précision des valeurs envoyées en JSON (décimales) et pas de quantification
+# de la confiance (%) : une décroissance plus fine n'est pas diffusée
+DECIMALES = 5
+PAS_CONFIANCE = 1.0
+
+
+def encoder_binaire(generation, identifiants, cellules):
+    """
+    Encode un état complet au format binaire du serveur.
+
+    Disposition (petit-boutiste) : en-tête :data:`EN_TETE`
+    (``b"TURB"``, version, 5, génération, N), puis N identifiants ``int64``,
+    puis la matrice *(N, 5)* en ``float32`` ligne par ligne.
+
+    :param generation: Génération publiée.
+    :type generation: int
+    :param identifiants: Identifiants des N cellules.
+    :type identifiants: numpy.ndarray
+    :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+    :type cellules: numpy.ndarray
+    :rtype: bytes
+    """
+    n = len(identifiants)
+    return (EN_TETE.pack(b"TURB", 1, len(COLONNES), generation, n)
+            + np.asarray(identifiants, dtype="<i8").tobytes()
+            + np.asarray(cellules, dtype="<f4").reshape(n, len(COLONNES)).tobytes())
+
+
+def _arrondir(cellules):
+    """Valeurs telles qu’envoyées : ``float32`` arrondi à :data:`DECIMALES` décimales."""
+    return np.round(np.asarray(cellules).astype(np.float32).astype(float), DECIMALES)
+
+
+def calculer_delta(ids_avant, cellules_avant, ids_apres, cellules_apres):
+    """
+    Compare deux états et renvoie les cellules ajoutées, déplacées, de
+    confiance modifiée et expirées.
+
+    Position, altitude et diamètre sont comparés à la précision envoyée
+    (:func:`_arrondir`) ; la confiance, qui décroît à chaque publication,
+    est comparée après quantification par :data:`PAS_CONFIANCE`, ce qui
+    borne l’écart d’un client à un pas sans dérive.
+
+    :return: ``(ajoutees, deplacees, confiances, expirees)`` : trois masques
+        booléens sur l’état ``apres`` (``confiances`` exclut les cellules
+        déplacées) et le tableau des identifiants disparus.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    communs, i_avant, i_apres = np.intersect1d(
+        ids_avant, ids_apres, assume_unique=True, return_indices=True)
+
+    ajoutees = np.ones(len(ids_apres), dtype=bool)
+    ajoutees[i_apres] = False
+
+    avant, apres = _arrondir(cellules_avant[i_avant]), _arrondir(cellules_apres[i_apres])
+    deplacees = np.zeros(len(ids_apres), dtype=bool)
+    deplacees[i_apres] = np.any(avant[:, :4] != apres[:, :4], axis=1)
+
+    confiances = np.zeros(len(ids_apres), dtype=bool)
+    confiances[i_apres] = (np.floor(avant[:, 4] / PAS_CONFIANCE)
+                           != np.floor(apres[:, 4] / PAS_CONFIANCE))
+    confiances &= ~deplacees
+
+    expirees = np.setdiff1d(ids_avant, communs, assume_unique=True)
+    return ajoutees, deplacees, confiances, expirees
+
+
+def _lignes(identifiants, cellules):
+    """Lignes JSON ``[id, lat, lon, alt, diam, confiance]`` arrondies."""
+    valeurs = _arrondir(cellules)
+    return [[int(i), *ligne] for i, ligne in zip(identifiants, valeurs.tolist())]
+
+
+class ServeurCellules:
+    """
+    Serveur HTTP de diffusion des cellules publiées par un collecteur.
+
+    Parameters
+    ----------
+    collecteur : main.Main
+        Collecteur dont on suit ``to_display`` / ``ids_display``.
+    hote : str, default ``"127.0.0.1"``
+        Adresse d’écoute.
+    port : int, default ``8502``
+        Port d’écoute.
+    historique : int, default ``64``
+        Nombre de générations conservées pour calculer les deltas.
+
+    Attributes
+    ----------
+    etats : collections.deque
+        Dernières publications ``(generation, identifiants, cellules)``.
+    """
+
+    def __init__(self, collecteur, hote="127.0.0.1", port=8502, historique=64):
+        self.collecteur = collecteur
+        self.etats = deque(maxlen=historique)
+        self.condition = threading.Condition()
+        self._arret = threading.Event()
+
+        self.httpd = ThreadingHTTPServer((hote, port), _Gestionnaire)
+        self.httpd.daemon_threads = True
+        self.httpd.cellules = self
+
+    def start(self):
+        """Démarre le suivi des publications et le serveur HTTP."""
+        threading.Thread(target=self._suivi, daemon=True,
+                         name="suivi-publications").start()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                         name="serveur-http").start()
+        return self
+
+    def stop(self):
+        """Arrête le serveur et réveille les flux en attente."""
+        self._arret.set()
+        with self.condition:
+            self.condition.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _suivi(self):
+        """Recopie chaque publication du collecteur dans ``etats``."""
+        vue = -1
+        publication = self.collecteur.publication
+        while not self._arret.is_set():
+            with publication:
+                publication.wait_for(
+                    lambda: self.collecteur.generation != vue, timeout=1)
+                if self.collecteur.generation == vue:
+                    continue
+                etat = (self.collecteur.generation, self.collecteur.ids_display,
+                        self.collecteur.to_display)
+            vue = etat[0]
+            with self.condition:
+                self.etats.append(etat)
+                self.condition.notify_all()
+
+    def dernier_etat(self):
+        """Renvoie la dernière publication ``(generation, ids, cellules)``."""
+        with self.condition:
+            if self.etats:
+                return self.etats[-1]
+        return 0, np.empty(0, dtype=np.int64), np.empty((0, 5))
+
+    def attendre(self, generation, timeout):
+        """Attend une publication postérieure à ``generation`` ; renvoie le dernier état."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self._arret.is_set()
+                or (self.etats and self.etats[-1][0] > generation),
+                timeout=timeout)
+        return self.dernier_etat()
+
+    def delta(self, depuis, etat):
+        """
+        Construit le message delta entre la génération ``depuis`` et ``etat``.
+
+        :return: Dictionnaire sérialisable en JSON.
+        :rtype: dict
+        """
+        generation, ids, cellules = etat
+        with self.condition:
+            base = next((e for e in self.etats if e[0] == depuis), None)
+
+        if base is None:
+            return {"generation": generation, "complet": True,
+                    "ajoutees": _lignes(ids, cellules),
+                    "deplacees": [], "confiances": [], "expirees": []}
+
+        ajoutees, deplacees, confiances, expirees = calculer_delta(base[1], base[2], ids, cellules)
+        return {"generation": generation, "complet": False,
+                "ajoutees": _lignes(ids[ajoutees], cellules[ajoutees]),
+                "deplacees": _lignes(ids[deplacees], cellules[deplacees]),
+                "confiances": [[int(i), c] for i, c in
+                               zip(ids[confiances], _arrondir(cellules[confiances, 4]).tolist())],
+                "expirees": expirees.tolist()}
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    """Traitement des requêtes ``GET`` du :class:`ServeurCellules`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        serveur = self.server.cellules
+
+        if url.path == "/instantane":
+            self._repondre("application/octet-stream",
+                           encoder_binaire(*serveur.dernier_etat()))
+        elif url.path == "/instantane.json":
+            generation, ids, cellules = serveur.dernier_etat()
+            corps = {"generation": generation,
+                     "colonnes": ["id"] + COLONNES,
+                     "cellules": _lignes(ids, cellules)}
+            self._repondre("application/json", json.dumps(corps).encode())
+        elif url.path == "/flux":
+            valeur = parse_qs(url.query).get("depuis", [self.headers.get("Last-Event-ID", "-1")])[0]
+            try:
+                depuis = int(valeur)
+            except ValueError:
+                self.send_error(400, "Génération « depuis » invalide")
+                return
+            self._flux(serveur, depuis)
+        else:
+            self.send_error(404)
+
+    def _repondre(self, type_contenu, corps):
+        self.send_response(200)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _flux(self, serveur, depuis):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while not serveur._arret.is_set():
+                etat = serveur.attendre(depuis, timeout=15)
+                if etat[0] > depuis:
+                    message = json.dumps(serveur.delta(depuis, etat))
+                    self.wfile.write(
+                        f"event: delta\nid: {etat[0]}\ndata: {message}\n\n".encode())
+                    depuis = etat[0]
+                else:
+                    self.wfile.write(b": maintien\n\n")   # garde la connexion ouverte
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass                                          # client déconnecté
+
+    def log_message(self, format, *args):
+        pass                                              # pas de journal par requête
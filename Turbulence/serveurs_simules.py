@@ -0,0 +1,289 @@
+"""
+serveurs_simules.py ― Simulateurs locaux d’OpenSky et d’Open-Meteo
+==================================================================
+
+Module d’essai du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+Deux serveurs HTTP locaux remplacent les API publiques pour faire tourner
+:class:`main.Main` sans réseau, de façon reproductible :
+
+* :class:`SimulateurOpenSky` – jeton OAuth2 (``POST /token``) et vecteurs
+  d’état (``GET /states``), synthétiques ou rejoués depuis un
+  enregistrement ;
+* :class:`SimulateurOpenMeteo` – vents horaires par niveau de pression
+  (``GET /forecast``), y compris pour plusieurs coordonnées séparées par
+  des virgules.
+
+Chaque réponse subit une latence ``N(latence, gigue)`` et échoue (code 503)
+avec la probabilité ``taux_erreur``. Exemple ::
+
+    with SimulateurOpenSky(n_avions=2000) as opensky, SimulateurOpenMeteo() as meteo:
+        collecteur = Main(url_opensky=opensky.url_etats, url_token=opensky.url_jeton,
+                          url_meteo=meteo.url_prevision)
+"""
+
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+class ServeurSimule:
+    """
+    Base des simulateurs : serveur HTTP local avec latence et erreurs injectées.
+
+    Parameters
+    ----------
+    hote : str, default ``"127.0.0.1"``
+        Adresse d’écoute.
+    port : int, default ``0``
+        Port d’écoute ; ``0`` laisse le système en choisir un libre.
+    latence : float, default ``0``
+        Latence moyenne ajoutée à chaque réponse (s).
+    gigue : float, default ``0``
+        Écart type de la latence (s).
+    taux_erreur : float, default ``0``
+        Probabilité qu’une requête échoue avec le code 503.
+    graine : int | None, optional
+        Graine du générateur aléatoire (latence, erreurs, trafic).
+
+    Attributes
+    ----------
+    url : str
+        Adresse de base ``http://hote:port``.
+    requetes : int
+        Nombre de requêtes reçues.
+    erreurs : int
+        Nombre d’erreurs injectées.
+    """
+
+    def __init__(self, hote="127.0.0.1", port=0, latence=0.0, gigue=0.0, taux_erreur=0.0,
+                 graine=None):
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.hasard = random.Random(graine)
+        self.rng = np.random.default_rng(graine)
+        self.lock = threading.Lock()
+        self.requetes = 0
+        self.erreurs = 0
+
+        self.httpd = ThreadingHTTPServer((hote, port), _Gestionnaire)
+        self.httpd.daemon_threads = True
+        self.httpd.simulateur = self
+        self.url = f"http://{hote}:{self.httpd.server_address[1]}"
+
+    def start(self):
+        """Démarre le serveur dans un thread *daemon*."""
+        threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                         name=type(self).__name__).start()
+        return self
+
+    def stop(self):
+        """Arrête le serveur."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def tirage(self):
+        """
+        Tire la latence et l’échec éventuel d’une requête.
+
+        :return: ``(attente_s, echec)``.
+        :rtype: tuple[float, bool]
+        """
+        with self.lock:
+            self.requetes += 1
+            attente = max(0.0, self.hasard.gauss(self.latence, self.gigue))
+            echec = self.hasard.random() < self.taux_erreur
+            self.erreurs += echec
+        return attente, echec
+
+    def repondre(self, methode, chemin, parametres):
+        """
+        Construit le corps JSON d’une réponse (à surcharger).
+
+        :return: Objet sérialisable, ou ``None`` pour une 404.
+        """
+        return None
+
+
+class SimulateurOpenSky(ServeurSimule):
+    """
+    Simulateur de l’API OpenSky.
+
+    En mode synthétique, ``n_avions`` appareils dérivent lentement et
+    entrent par moments dans des rafales où leur ``vertical_rate`` oscille
+    de ±``amplitude`` m/s, ce qui déclenche :class:`turbulence.TurbulenceDetector`.
+    Chaque appel à ``/states`` avance le trafic d’un tick.
+
+    Parameters
+    ----------
+    n_avions : int, default ``1000``
+        Nombre d’avions synthétiques.
+    enregistrement : list[list[list]] | None, optional
+        Suite de réponses ``states`` enregistrées, rejouées en boucle à la
+        place du trafic synthétique.
+    probabilite_rafale : float, default ``0.01``
+        Probabilité, par avion et par tick, d’entrer dans une rafale.
+    duree_rafale : int, default ``6``
+        Durée d’une rafale (ticks).
+    amplitude : float, default ``8``
+        Amplitude de l’oscillation du ``vertical_rate`` en rafale (m/s).
+    **kwargs
+        Paramètres de :class:`ServeurSimule`.
+    """
+
+    def __init__(self, n_avions=1000, enregistrement=None, probabilite_rafale=0.01,
+                 duree_rafale=6, amplitude=8.0, **kwargs):
+        super().__init__(**kwargs)
+        self.enregistrement = enregistrement
+        self.probabilite_rafale = probabilite_rafale
+        self.duree_rafale = duree_rafale
+        self.amplitude = amplitude
+        self.tick = 0
+
+        self.noms = np.array([f"{i:06x}" for i in range(n_avions)])
+        self.lat = self.rng.uniform(-60, 70, n_avions)
+        self.lon = self.rng.uniform(-180, 180, n_avions)
+        self.alt = self.rng.uniform(3000, 12500, n_avions)
+        self.cap = self.rng.uniform(0, 2 * np.pi, n_avions)
+        self.rafale = np.zeros(n_avions, dtype=np.int64)    # ticks de rafale restants
+
+    @property
+    def url_jeton(self):
+        return self.url + "/token"
+
+    @property
+    def url_etats(self):
+        return self.url + "/states"
+
+    def etats(self):
+        """Avance le trafic d’un tick et renvoie la liste ``states`` au format OpenSky."""
+        with self.lock:
+            self.tick += 1
+            if self.enregistrement is not None:
+                return self.enregistrement[(self.tick - 1) % len(self.enregistrement)]
+
+            n = len(self.noms)
+            # ~250 m/s pendant 6 s
+            self.lat = np.clip(self.lat + 0.0135 * np.cos(self.cap), -85, 85)
+            self.lon = (self.lon + 0.0135 * np.sin(self.cap) + 180) % 360 - 180
+            self.rafale = np.maximum(self.rafale - 1, 0)
+            self.rafale[(self.rafale == 0)
+                        & (self.rng.random(n) < self.probabilite_rafale)] = self.duree_rafale
+            vr = self.rng.normal(0, 0.5, n)
+            vr[self.rafale > 0] += self.amplitude * (-1) ** self.tick
+            lat, lon, alt, noms, tick = self.lat, self.lon, self.alt, self.noms, self.tick
+
+        return [[nom, None, "Simulation", tick, tick, x, y, z, False, 250.0, 0.0, v, None, z,
+                 None, False, 0]
+                for nom, x, y, z, v in zip(noms.tolist(), lon.tolist(), lat.tolist(),
+                                           alt.tolist(), vr.tolist())]
+
+    def repondre(self, methode, chemin, parametres):
+        if methode == "POST" and chemin == "/token":
+            return {"access_token": "simulation", "expires_in": 1800}
+        if methode == "GET" and chemin == "/states":
+            return {"time": int(time.time()), "states": self.etats()}
+        return None
+
+
+class SimulateurOpenMeteo(ServeurSimule):
+    """
+    Simulateur de l’API de prévision Open-Meteo.
+
+    Les vents sont des fonctions lisses et déterministes de la position et
+    du niveau : deux requêtes identiques renvoient les mêmes valeurs.
+    Comme l’API réelle, plusieurs coordonnées séparées par des virgules
+    donnent une liste de réponses.
+
+    Parameters
+    ----------
+    heures : int, default ``24``
+        Nombre de pas horaires renvoyés par variable.
+    **kwargs
+        Paramètres de :class:`ServeurSimule`.
+    """
+
+    def __init__(self, heures=24, **kwargs):
+        super().__init__(**kwargs)
+        self.heures = heures
+
+    @property
+    def url_prevision(self):
+        return self.url + "/v1/forecast"
+
+    def _vent(self, lat, lon, variable):
+        """Série horaire d’une variable ``wind_speed_XhPa`` ou ``wind_direction_XhPa``."""
+        niveau = float(variable.split("_")[-1].removesuffix("hPa"))
+        heures = np.arange(self.heures)
+        if variable.startswith("wind_speed"):
+            # Jet plus fort en altitude (basse pression) et aux moyennes latitudes
+            base = 5 + 40 * (1 - niveau / 1000) * np.cos(np.radians(lat - 45)) ** 2
+            serie = base + 3 * np.sin(np.radians(lon) + heures / 6)
+        else:
+            serie = (270 + 30 * np.sin(np.radians(2 * lat)) + 10 * np.cos(heures / 4)) % 360
+        return np.round(serie, 1).tolist()
+
+    def repondre(self, methode, chemin, parametres):
+        if methode != "GET" or chemin != "/v1/forecast":
+            return None
+        latitudes = [float(v) for v in parametres["latitude"][0].split(",")]
+        longitudes = [float(v) for v in parametres["longitude"][0].split(",")]
+        variables = [v for v in parametres["hourly"][0].split(",") if v]
+
+        reponses = [{"latitude": lat, "longitude": lon,
+                     "hourly": {v: self._vent(lat, lon, v) for v in variables}}
+                    for lat, lon in zip(latitudes, longitudes)]
+        return reponses if len(reponses) > 1 else reponses[0]
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    """Traitement des requêtes des simulateurs."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._traiter("GET")
+
+    def do_POST(self):
+        longueur = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(longueur)                         # corps ignoré (identifiants)
+        self._traiter("POST")
+
+    def _traiter(self, methode):
+        simulateur = self.server.simulateur
+        url = urlparse(self.path)
+        attente, echec = simulateur.tirage()
+        time.sleep(attente)
+
+        if echec:
+            self._repondre(503, {"erreur": "erreur simulée"})
+            return
+        corps = simulateur.repondre(methode, url.path, parse_qs(url.query))
+        if corps is None:
+            self._repondre(404, {"erreur": "inconnu"})
+        else:
+            self._repondre(200, corps)
+
+    def _repondre(self, code, corps):
+        donnees = json.dumps(corps).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def log_message(self, format, *args):
+        pass                                              # pas de journal par requête
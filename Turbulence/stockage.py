@@ -0,0 +1,236 @@
+"""
+stockage.py ― Archivage des turbulences sur disque
+==================================================
+
+Module de persistance du projet *ETS_en_Turbulence* (MGA802, ÉTS Montréal).
+
+:class:`MagasinEvenements` archive, sans jamais bloquer la boucle de
+:class:`main.Main`, les turbulences confirmées par
+:class:`turbulence.TurbulenceDetector` et les cellules déplacées par
+:func:`modele_deplacement_turbulence.deplacement_turbulence`.
+
+Organisation sur disque
+-----------------------
+Une partition par heure UTC (``racine/AAAAMMJJHH/``), contenant :
+
+* un fichier binaire par colonne (``temps.bin``, ``lat.bin``, …), alimenté
+  en ajout seul et relu par :class:`numpy.memmap` ;
+* ``index.json`` : nombre de lignes valides et bornes min/max de
+  ``temps``, ``lat``, ``lon`` et ``alt``, qui permettent d’écarter une
+  partition sans l’ouvrir. L’index fait foi : une écriture interrompue
+  avant sa mise à jour est effacée à l’écriture suivante.
+"""
+
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+# Origine des lignes archivées (colonne ``type``)
+TYPE_EVENEMENT = 0
+TYPE_ADVECTION = 1
+
+COLONNES = {
+    "temps": np.float64,
+    "lat": np.float32,
+    "lon": np.float32,
+    "alt": np.float32,
+    "diam": np.float32,
+    "conf": np.float32,
+    "type": np.uint8,
+}
+COLONNES_INDEXEES = ("temps", "lat", "lon", "alt")
+
+
+def nom_partition(horodatage):
+    """Nom ``AAAAMMJJHH`` de la partition horaire UTC d’un horodatage epoch."""
+    return datetime.fromtimestamp(horodatage, timezone.utc).strftime("%Y%m%d%H")
+
+
+def debut_partition(nom):
+    """Horodatage epoch du début de la partition ``nom``."""
+    return datetime.strptime(nom, "%Y%m%d%H").replace(tzinfo=timezone.utc).timestamp()
+
+
+class MagasinEvenements:
+    """
+    Magasin en ajout seul, partitionné par heure.
+
+    Les écritures sont mises en file par :meth:`ajouter` puis regroupées et
+    écrites par un thread dédié toutes les ``periode_ecriture`` secondes.
+
+    Parameters
+    ----------
+    racine : str
+        Dossier racine du magasin (créé au besoin).
+    periode_ecriture : float, default ``5``
+        Délai maximal (s) entre deux écritures groupées.
+
+    Attributes
+    ----------
+    file : queue.Queue
+        Lots ``(horodatage, cellules, type)`` en attente d’écriture.
+    """
+
+    def __init__(self, racine, periode_ecriture=5):
+        self.racine = racine
+        self.periode_ecriture = periode_ecriture
+        os.makedirs(racine, exist_ok=True)
+
+        self.file = queue.Queue()
+        self._arret = threading.Event()
+        self._ecrivain = threading.Thread(target=self._boucle_ecriture, daemon=True,
+                                          name="stockage-evenements")
+        self._ecrivain.start()
+
+    def ajouter(self, cellules, type_ligne, horodatage=None):
+        """
+        Met en file un lot de cellules à archiver (ne bloque jamais).
+
+        :param cellules: Tableau *(N, 5)* ``[lat, lon, alt, diam, confiance]``.
+        :type cellules: numpy.ndarray
+        :param type_ligne: :data:`TYPE_EVENEMENT` ou :data:`TYPE_ADVECTION`.
+        :type type_ligne: int
+        :param horodatage: Instant associé (secondes epoch) ; maintenant par défaut.
+        :type horodatage: float, optional
+        """
+        if len(cellules):
+            self.file.put_nowait((horodatage or time.time(),
+                                  np.array(cellules, dtype=np.float32), type_ligne))
+
+    def fermer(self):
+        """Écrit les lots en attente puis arrête le thread d’écriture."""
+        self._arret.set()
+        self._ecrivain.join()
+
+    def _boucle_ecriture(self):
+        """Regroupe périodiquement les lots en file et les écrit sur disque."""
+        while not self._arret.wait(self.periode_ecriture):
+            self._vider_file()
+        self._vider_file()
+
+    def _vider_file(self):
+        lots = []
+        while True:
+            try:
+                lots.append(self.file.get_nowait())
+            except queue.Empty:
+                break
+        if not lots:
+            return
+
+        temps = np.concatenate([np.full(len(c), t) for t, c, _ in lots])
+        cellules = np.concatenate([c for _, c, _ in lots])
+        types = np.concatenate([np.full(len(c), ty, dtype=np.uint8) for _, c, ty in lots])
+        colonnes = {"temps": temps, "lat": cellules[:, 0], "lon": cellules[:, 1],
+                    "alt": cellules[:, 2], "diam": cellules[:, 3],
+                    "conf": cellules[:, 4], "type": types}
+
+        heures = np.floor(temps / 3600)
+        for heure in np.unique(heures):
+            masque = heures == heure
+            self._ecrire_partition(nom_partition(heure * 3600),
+                                   {nom: valeurs[masque] for nom, valeurs in colonnes.items()})
+
+    def _ecrire_partition(self, nom, colonnes):
+        dossier = os.path.join(self.racine, nom)
+        os.makedirs(dossier, exist_ok=True)
+        index = self._lire_index(dossier) or {"n": 0}
+
+        for colonne, dtype in COLONNES.items():
+            chemin = os.path.join(dossier, f"{colonne}.bin")
+            # L'index fait foi : les octets écrits après sa dernière mise à
+            # jour (écriture interrompue) sont retirés avant l'ajout.
+            taille = index["n"] * np.dtype(dtype).itemsize
+            if os.path.exists(chemin) and os.path.getsize(chemin) > taille:
+                os.truncate(chemin, taille)
+            with open(chemin, "ab") as f:
+                f.write(np.asarray(colonnes[colonne], dtype=dtype).tobytes())
+
+        # L'index n'est remplacé qu'après l'écriture des données : un lecteur
+        # ne voit donc jamais de ligne incomplète.
+        index["n"] += len(colonnes["temps"])
+        for colonne in COLONNES_INDEXEES:
+            valeurs = colonnes[colonne]
+            bornes = index.get(colonne, [float(valeurs.min()), float(valeurs.max())])
+            index[colonne] = [min(bornes[0], float(valeurs.min())),
+                              max(bornes[1], float(valeurs.max()))]
+
+        provisoire = os.path.join(dossier, "index.json.tmp")
+        with open(provisoire, "w") as f:
+            json.dump(index, f)
+        os.replace(provisoire, os.path.join(dossier, "index.json"))
+
+    @staticmethod
+    def _lire_index(dossier):
+        try:
+            with open(os.path.join(dossier, "index.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def partitions(self, debut, fin):
+        """
+        Liste les partitions qui recouvrent l’intervalle ``[debut, fin]``.
+
+        :rtype: list[str]
+        """
+        return sorted(nom for nom in os.listdir(self.racine)
+                      if len(nom) == 10 and nom.isdigit()
+                      and debut_partition(nom) <= fin
+                      and debut_partition(nom) + 3600 > debut)
+
+    def requete(self, debut, fin, lat=None, lon=None, alt=None, type_ligne=None):
+        """
+        Renvoie les lignes archivées dans un intervalle de temps et une zone.
+
+        Seules les partitions dont l’heure et les bornes indexées recoupent
+        la requête sont ouvertes (par *memory-mapping*).
+
+        :param debut: Début de l’intervalle (secondes epoch).
+        :type debut: float
+        :param fin: Fin de l’intervalle (secondes epoch).
+        :type fin: float
+        :param lat: Bornes ``(min, max)`` de latitude, facultatives.
+        :type lat: tuple[float, float], optional
+        :param lon: Bornes ``(min, max)`` de longitude, facultatives.
+        :type lon: tuple[float, float], optional
+        :param alt: Bornes ``(min, max)`` d’altitude (m), facultatives.
+        :type alt: tuple[float, float], optional
+        :param type_ligne: Ne garder qu’un type de ligne, facultatif.
+        :type type_ligne: int, optional
+        :return: Un tableau par colonne (voir :data:`COLONNES`).
+        :rtype: dict[str, numpy.ndarray]
+        """
+        filtres = {"temps": (debut, fin), "lat": lat, "lon": lon, "alt": alt}
+        morceaux = {colonne: [] for colonne in COLONNES}
+
+        for nom in self.partitions(debut, fin):
+            dossier = os.path.join(self.racine, nom)
+            index = self._lire_index(dossier)
+            if not index or any(
+                    bornes is not None and (index[col][1] < bornes[0] or index[col][0] > bornes[1])
+                    for col, bornes in filtres.items()):
+                continue
+
+            colonnes = {colonne: np.memmap(os.path.join(dossier, f"{colonne}.bin"),
+                                           dtype=dtype, mode="r", shape=(index["n"],))
+                        for colonne, dtype in COLONNES.items()}
+            masque = np.ones(index["n"], dtype=bool)
+            for colonne, bornes in filtres.items():
+                if bornes is not None:
+                    masque &= (colonnes[colonne] >= bornes[0]) & (colonnes[colonne] <= bornes[1])
+            if type_ligne is not None:
+                masque &= colonnes["type"] == type_ligne
+
+            for colonne in COLONNES:
+                morceaux[colonne].append(np.asarray(colonnes[colonne][masque]))
+
+        return {colonne: np.concatenate(valeurs) if valeurs else np.empty(0, dtype=COLONNES[colonne])
+                for colonne, valeurs in morceaux.items()}
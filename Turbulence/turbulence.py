@@ -13,14 +13,20 @@ d’une **turbulence** :
 1. **Historique** par appareil (latitude, longitude, altitude, *vr*).
 2. **Instabilité provisoire** : au moins 3 ticks instables consécutifs.
 3. **Turbulence confirmée** : fin lorsque l’avion redevient stable 2 ticks.
-4. **Sortie** : événements terminés ⟶ centre + diamètre en km.
+4. **Sortie** : événements terminés ⟶ centre + diamètre en km, puis fusion
+   des événements simultanés d’avions différents (:mod:`fusion`) ; les
+   événements des ticks suivants renforcent les cellules déjà actives
+   (:meth:`main.Main._renforcer`).
 """
 
 
-import math
+import time
 from collections import deque
 import numpy as np
 
+from geodesie import haversine_km
+from fusion import fusionner_evenements
+
 class TurbulenceDetector:
     """
     Détecteur d’instabilités verticales sur une fenêtre glissante.
@@ -29,6 +35,27 @@ class TurbulenceDetector:
     ----------
     window_size : int, default ``5``
         Nombre de ticks conservés dans l’historique pour chaque avion.
+    fusion : bool, default ``True``
+        Fusionne les événements proches en temps, distance et altitude
+        (:func:`fusion.fusionner_evenements`) ; sinon une cellule de
+        confiance 100 par événement.
+    seuil_saut : float, default ``10``
+        Saut instantané de *vr* (m/s) suffisant pour une instabilité.
+    seuil_oscillation : float, default ``12``
+        Mouvement cumulé minimal (m/s) lorsque *vr* s’inverse au moins
+        ``inversions_min`` fois.
+    seuil_inversion : float, default ``15``
+        Mouvement cumulé minimal (m/s) pour une inversion unique (ou moins
+        de ``inversions_min``).
+    inversions_min : int, default ``2``
+        Nombre d’inversions de direction caractérisant une oscillation.
+    ticks_confirmation : int, default ``3``
+        Ticks instables consécutifs avant confirmation d’une turbulence.
+    ticks_liberation : int, default ``2``
+        Ticks stables consécutifs clôturant une turbulence confirmée.
+
+    Les seuils peuvent être calibrés sur du trafic enregistré avec
+    :func:`calibration.calibrer`.
 
     Attributes
     ----------
@@ -40,16 +67,24 @@ class TurbulenceDetector:
         Turbulences confirmées non encore clôturées.
     """
 
-    def __init__(self, window_size=5):
+    def __init__(self, window_size=5, fusion=True, seuil_saut=10.0, seuil_oscillation=12.0,
+                 seuil_inversion=15.0, inversions_min=2, ticks_confirmation=3, ticks_liberation=2):
         self.window_size = window_size
+        self.fusion = fusion
+        self.seuil_saut = seuil_saut
+        self.seuil_oscillation = seuil_oscillation
+        self.seuil_inversion = seuil_inversion
+        self.inversions_min = inversions_min
+        self.ticks_confirmation = ticks_confirmation
+        self.ticks_liberation = ticks_liberation
 
         # Historique des derniers états pour chaque avion: {nom_avion: deque[maxlen=window_size] de tuples (lat, lon, alt, vr)}
         self.history = {}
 
-        # Instabilités provisoires: {nom_avion: {"count": nb_ticks_instables_consecutifs, "start": (lat, lon, alt)}}
+        # Instabilités provisoires: {nom_avion: {"count": nb_ticks_instables_consecutifs, "start": (lat, lon, alt), "intensite": saut_max_vr}}
         self.instabilite_provisoire = {}
 
-        # Turbulences en cours: {nom_avion: {"start": (lat, lon, alt), "end": (lat, lon, alt) ou None, "stable_count": nb_ticks_stables_consecutifs}}
+        # Turbulences en cours: {nom_avion: {"start": (lat, lon, alt), "end": (lat, lon, alt) ou None, "stable_count": nb_ticks_stables_consecutifs, "intensite": saut_max_vr}}
         self.turbulence_en_cours = {}
 
     def update(self, states_df):
@@ -69,9 +104,9 @@ class TurbulenceDetector:
             Une colonne ``nom`` est également attendue pour l'identification des avions.
         :type states_df: pandas.DataFrame
 
-        :return: Une liste d’événements de turbulence terminés. Chaque événement est représenté par un dictionnaire
-            contenant les coordonnées de début et de fin, ainsi que la distance horizontale entre les deux points.
-        :rtype: list of dict
+        :return: Tableau *(N, 5)* ``[lat, lon, alt, diam_km, confiance]`` des turbulences terminées,
+            après fusion des événements voisins si ``fusion`` est actif.
+        :rtype: numpy.ndarray
         """
 
         # On transforme l'index numérique en nom pour regrouper les données par avion
@@ -117,12 +152,16 @@ class TurbulenceDetector:
             vertical_rates = [state[3] for state in hist_deque]  # index 3 correspond à vertical_rate
             # Vérifier l'instabilité du vertical_rate sur ces N valeurs
             instable = self.instabilite_detectee(vertical_rates)
+            # Intensité du signal : plus grand saut de vertical_rate de la fenêtre
+            intensite = max(abs(b - a) for a, b in zip(vertical_rates, vertical_rates[1:]))
 
             # Si l'avion est actuellement en turbulence confirmée, on gère directement la logique de fin potentielle
             if plane_name in self.turbulence_en_cours:
                 if instable:
                     # Si l'avion est en turbulence et reste instable, reset du compteur de stabilité
                     self.turbulence_en_cours[plane_name]['stable_count'] = 0
+                    self.turbulence_en_cours[plane_name]['intensite'] = max(
+                        self.turbulence_en_cours[plane_name]['intensite'], intensite)
                 else:
                     # Avion en turbulence qui devient stable
                     self.turbulence_en_cours[plane_name]['stable_count'] += 1
@@ -132,20 +171,20 @@ class TurbulenceDetector:
                         self.turbulence_en_cours[plane_name]['candidate_end'] = (
                             lat_end, lon_end, alt_end)
 
-                    if self.turbulence_en_cours[plane_name]['stable_count'] == 2:
-                        # Deux ticks stables consécutifs -> fin de la turbulence
-                        # Calculer le "diamètre" basé sur la distance entre début et fin
+                    if self.turbulence_en_cours[plane_name]['stable_count'] == self.ticks_liberation:
+                        # Assez de ticks stables consécutifs -> fin de la turbulence
+                        # (le "diamètre" est calculé en lot par centre_turbulence)
 
                         start_coords = self.turbulence_en_cours[plane_name]['start']
                         end_coords = self.turbulence_en_cours[plane_name].get(
                             'candidate_end')
 
-                        distance_km = self.distance_horizontale_km(start_coords, end_coords)
                         # Préparer l'événement de turbulence terminé
                         event = {
                             "start": {"lat": start_coords[0], "lon": start_coords[1], "alt": start_coords[2]},
                             "end": {"lat": end_coords[0], "lon": end_coords[1], "alt": end_coords[2]},
-                            "distance_km": round(distance_km, 3)
+                            "avion": plane_name,
+                            "intensite": self.turbulence_en_cours[plane_name]['intensite'],
                         }
                         turbulences_terminees.append(event)
                         # Retirer l'événement de turbulence en cours (l'avion redevient normal)
@@ -159,28 +198,56 @@ class TurbulenceDetector:
                 if plane_name in self.instabilite_provisoire:
                     # Incrémenter le compteur d'instabilité consécutive
                     self.instabilite_provisoire[plane_name]['count'] += 1
+                    self.instabilite_provisoire[plane_name]['intensite'] = max(
+                        self.instabilite_provisoire[plane_name]['intensite'], intensite)
                 else:
                     # Ajouter l'avion en instabilité provisoire avec compteur = 1
                     lat0, lon0, alt0, _ = hist_deque[-1]  # coordonnées au tick actuel (début de l'instabilité)
-                    self.instabilite_provisoire[plane_name] = {"count": 1, "start": (lat0, lon0, alt0)}
-                # Vérifier si on atteint 3 instabilités consécutives
-                if self.instabilite_provisoire[plane_name]['count'] >= 3:
+                    self.instabilite_provisoire[plane_name] = {"count": 1, "start": (lat0, lon0, alt0),
+                                                               "intensite": intensite}
+                # Vérifier si on atteint le nombre d'instabilités consécutives requis
+                if self.instabilite_provisoire[plane_name]['count'] >= self.ticks_confirmation:
                     # Valider la turbulence
                     start_coords = self.instabilite_provisoire[plane_name]['start']
                     # Initialiser un enregistrement de turbulence en cours avec le point de début
-                    self.turbulence_en_cours[plane_name] = {"start": start_coords, "end": None, "stable_count": 0}
+                    self.turbulence_en_cours[plane_name] = {
+                        "start": start_coords, "end": None, "stable_count": 0,
+                        "intensite": self.instabilite_provisoire[plane_name]['intensite']}
                     # Enlever l'avion de la liste provisoire
                     self.instabilite_provisoire.pop(plane_name, None)
                     # (Optionnel: on pourrait signaler immédiatement le début de turbulence ici, selon les besoins)
             else:
                 # Cas 3b. Avion stable actuellement
                 if plane_name in self.instabilite_provisoire:
-                    # Il redevient stable avant 3 -> annuler l'instabilité provisoire
+                    # Il redevient stable avant confirmation -> annuler l'instabilité provisoire
                     self.instabilite_provisoire.pop(plane_name, None)
                 # (Si l'avion n'était ni instable provisoire ni en turbulence, ne rien faire)
 
         print(f"Nombre d'avions en turbulence: {len(self.turbulence_en_cours)}")# //////////////////////////////////////////////////////
-        return self.centre_turbulence(turbulences_terminees)
+        centres = self.centre_turbulence(turbulences_terminees)
+        if not self.fusion or not len(centres):
+            return centres
+
+        # Plusieurs avions dans la même zone au même tick -> une seule cellule
+        # (les événements des ticks suivants sont fusionnés par Main)
+        intensites = [evt["intensite"] for evt in turbulences_terminees]
+        return fusionner_evenements(centres, intensites, np.full(len(centres), time.time()))
+
+    def positions_a_surveiller(self):
+        """Positions courantes des avions en instabilité provisoire ou en turbulence.
+
+        Ces avions sont susceptibles de produire une cellule dans les
+        prochains ticks : leurs positions permettent de préchauffer les
+        données de vent (:meth:`requetes_meteo.OpenMeteo.prechauffer`).
+
+        :return: Tableau *(K, 3)* ``[lat, lon, alt]`` des derniers états connus.
+        :rtype: numpy.ndarray
+        """
+        avions = [nom for nom in (*self.instabilite_provisoire, *self.turbulence_en_cours)
+                  if nom in self.history]
+        if not avions:
+            return np.empty((0, 3), dtype=float)
+        return np.array([self.history[nom][-1][:3] for nom in avions], dtype=float)
 
     def instabilite_detectee(self, vr_list):
         """Détecte une instabilité verticale (turbulence) à partir d'une série de vitesses verticales.
@@ -190,10 +257,10 @@ class TurbulenceDetector:
         les variations de direction et d’amplitude. Elle retourne `True` si un comportement
         turbulent est détecté, `False` sinon.
 
-        Critères :\n
-        - Saut instantané important (variation >= 10 m/s entre deux pas)\n
-        - Au moins deux inversions de direction avec un mouvement cumulé > 12 m\n
-        - Une seule inversion avec un mouvement cumulé > 15 m\n
+        Critères (seuils par défaut, réglables à la construction) :\n
+        - Saut instantané important (variation >= ``seuil_saut`` = 10 m/s entre deux pas)\n
+        - Au moins ``inversions_min`` = 2 inversions de direction avec un mouvement cumulé > ``seuil_oscillation`` = 12 m\n
+        - Une seule inversion avec un mouvement cumulé > ``seuil_inversion`` = 15 m\n
 
         :param vr_list: Liste de 5 valeurs successives de vertical_rate (m/s)
         :type vr_list: list of float
@@ -226,11 +293,11 @@ class TurbulenceDetector:
         total_movement = sum(abs(d) for d in diffs)
         # Définition des critères de turbulence basés sur les seuils heuristiques
         # Critère 1 : saut instantané grand
-        large_jump = any(abs(d) >= 10 for d in diffs)
+        large_jump = any(abs(d) >= self.seuil_saut for d in diffs)
         # Critère 2 : au moins 2 inversions de direction (oscillation marquée) avec mouvement total > 12m
-        multi_flip = (sign_changes >= 2 and total_movement > 12)
+        multi_flip = (sign_changes >= self.inversions_min and total_movement > self.seuil_oscillation)
         # Critère 3 : 1 inversion de direction (une oscillation) mais avec mouvement total > 15m
-        one_flip = (sign_changes == 1 and total_movement > 15)
+        one_flip = (1 <= sign_changes < self.inversions_min and total_movement > self.seuil_inversion)
 
         # Décision : turbulence détectée si l'un des critères est rempli
         if large_jump or multi_flip or one_flip:
@@ -241,9 +308,9 @@ class TurbulenceDetector:
     def distance_horizontale_km(self, coord1, coord2):
         """Calcule la distance horizontale entre deux points géographiques.
 
-        Cette méthode utilise la formule de Haversine pour calculer la distance
-        horizontale (ignorant l'altitude) entre deux points donnés sous la
-        forme (latitude, longitude, altitude).
+        Cette méthode utilise la formule de Haversine (:func:`geodesie.haversine_km`)
+        pour calculer la distance horizontale (ignorant l'altitude) entre deux points
+        donnés sous la forme (latitude, longitude, altitude).
 
         :param coord1: Coordonnées du premier point (lat, lon, alt)
         :type coord1: tuple of float
@@ -256,17 +323,7 @@ class TurbulenceDetector:
         """
         lat1, lon1, _ = coord1
         lat2, lon2, _ = coord2
-        # Conversion degrés -> radians
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        # Rayon de la Terre en km (sphère moyenne)
-        R = 6371.0
-        # Formule de haversine
-        a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = R * c * 10000
-        return distance
+        return float(haversine_km(lat1, lon1, lat2, lon2))
 
     def centre_turbulence(self, turb):
         """Calcule le centre estimé des turbulences détectées.
@@ -274,24 +331,27 @@ class TurbulenceDetector:
         Chaque événement de turbulence est représenté par un dictionnaire contenant
         un point de départ et un point de fin avec coordonnées (lat, lon, alt).
         Le centre est défini comme la moyenne des coordonnées de début et de fin.
-        On ajoute également le diamètre horizontal (distance_km) et une confiance
-        (fixée ici à 100).
+        On ajoute également le diamètre horizontal (distance haversine entre début
+        et fin, en km, calculée en une fois pour tous les événements) et une
+        confiance (fixée ici à 100).
 
         :param turb: Liste d'événements de turbulence renvoyés par `update()`.
-            Chaque événement est un dictionnaire contenant les clés 'start', 'end' et 'distance_km'.
+            Chaque événement est un dictionnaire contenant les clés 'start' et 'end'.
         :type turb: list of dict
 
         :return: Tableau numpy de forme (N, 5) contenant :
             latitude, longitude, altitude du centre, diamètre, niveau de confiance
         :rtype: numpy.ndarray
         """
-        centres = []
-        for evt in turb:  # evt est un dict 'start' / 'end'
-            lat_c = (evt['start']['lat'] + evt['end']['lat']) / 2.0
-            lon_c = (evt['start']['lon'] + evt['end']['lon']) / 2.0
-            alt_c = (evt['start']['alt'] + evt['end']['alt']) / 2.0
-            diam = evt['distance_km']
-            confiance = 100
-            centres.append((lat_c, lon_c, alt_c, diam, confiance))
-
-        return np.asarray(centres, dtype=float)
\ No newline at end of file
+        if not turb:
+            return np.empty((0, 5), dtype=float)
+
+        # Colonnes : lat, lon, alt des points de début et de fin
+        debut = np.array([[e['start']['lat'], e['start']['lon'], e['start']['alt']] for e in turb], dtype=float)
+        fin = np.array([[e['end']['lat'], e['end']['lon'], e['end']['alt']] for e in turb], dtype=float)
+
+        centres = np.empty((len(turb), 5), dtype=float)
+        centres[:, :3] = (debut + fin) / 2.0
+        centres[:, 3] = haversine_km(debut[:, 0], debut[:, 1], fin[:, 0], fin[:, 1])
+        centres[:, 4] = 100
+        return centres